@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+
+class AgentPool:
+    # Keeps up to `size` pre-built agents per workflow type. acquire() hands out an idle agent
+    # with its memory reset, or builds a new one when all are busy, so a leaked agent (e.g. a
+    # workflow that timed out between steps) can never block later runs. release() keeps the
+    # agent if there is room; agents idle for longer than idle_timeout are dropped.
+    def __init__(self, factory: Callable[[], Any], size: int = 4, idle_timeout: Optional[float] = 600.0):
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.metrics = {"created": 0, "reused": 0, "released": 0, "discarded": 0, "evicted": 0, "in_use": 0}
+        self._idle: List[Tuple[float, Any]] = []
+        self._lock = threading.Lock()
+
+    def _evict_idle(self):
+        if self.idle_timeout is None:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        kept = [(released_at, agent) for released_at, agent in self._idle if released_at >= cutoff]
+        self.metrics["evicted"] += len(self._idle) - len(kept)
+        self._idle = kept
+
+    def warm(self, count: Optional[int] = None):
+        count = self.size if count is None else min(count, self.size)
+        with self._lock:
+            missing = count - len(self._idle)
+        for _ in range(max(missing, 0)):
+            agent = self.factory()
+            with self._lock:
+                self.metrics["created"] += 1
+                self._idle.append((time.monotonic(), agent))
+
+    def acquire(self):
+        with self._lock:
+            self._evict_idle()
+            self.metrics["in_use"] += 1
+            if self._idle:
+                # Most recently released first; its HTTP connections are the most likely to be alive
+                _, agent = self._idle.pop()
+                self.metrics["reused"] += 1
+            else:
+                agent = None
+
+        if agent is None:
+            agent = self.factory()
+            with self._lock:
+                self.metrics["created"] += 1
+        agent.reset()
+        return agent
+
+    def release(self, agent):
+        with self._lock:
+            self.metrics["in_use"] -= 1
+            self._evict_idle()
+            if len(self._idle) < self.size:
+                self._idle.append((time.monotonic(), agent))
+                self.metrics["released"] += 1
+            else:
+                self.metrics["discarded"] += 1
+
+    @contextmanager
+    def checkout(self):
+        agent = self.acquire()
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.metrics, idle=len(self._idle), size=self.size)
+
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))
+AGENT_POOL_IDLE_TIMEOUT = float(os.getenv("AGENT_POOL_IDLE_TIMEOUT", "600"))
+
+_pools: Dict[Tuple, AgentPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_agent_pool(key: Tuple, factory: Callable[[], Any]) -> AgentPool:
+    # One pool per key (workflow type + model); factory is only used the first time a key is seen
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = AgentPool(factory, size=AGENT_POOL_SIZE, idle_timeout=AGENT_POOL_IDLE_TIMEOUT)
+        return _pools[key]
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {"/".join(key): pool.stats() for key, pool in pools.items()}
@@ -0,0 +1,72 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+import threading
+import time
+
+# Streamlit imports the app's modules once per process and re-executes only the script on every
+# interaction, so the first import of this module marks the cold start
+PROCESS_STARTED = time.perf_counter()
+
+_first_render: Optional[float] = None
+_lock = threading.Lock()
+
+
+class Warmup:
+    # Runs a loader (heavy imports, clients, agents) in a background thread so the page renders
+    # right away; result() blocks only if the loader has not finished yet
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.duration: Optional[float] = None
+        self._future: Future = Future()
+        threading.Thread(target=self._run, args=(loader,), name=f"warmup-{name}", daemon=True).start()
+
+    def _run(self, loader: Callable[[], Any]):
+        started = time.perf_counter()
+        try:
+            result = loader()
+        except BaseException as e:
+            self._record(started)
+            self._future.set_exception(e)
+        else:
+            self._record(started)
+            self._future.set_result(result)
+
+    def _record(self, started: float):
+        self.duration = time.perf_counter() - started
+        print(f"Warmup {self.name} finished in {self.duration * 1000:.0f} ms")
+
+    @property
+    def ready(self) -> bool:
+        return self._future.done()
+
+    @property
+    def failed(self) -> bool:
+        return self._future.done() and self._future.exception() is not None
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self._future.result(timeout)
+
+
+def current_warmup(factory: Callable[[], Warmup]) -> Warmup:
+    # factory is an st.cache_resource function. A failed warmup (e.g. the model download or the
+    # tool schema fetch) is dropped from the cache and started again, instead of failing every
+    # later session until the server restarts.
+    warmup = factory()
+    if warmup.failed:
+        factory.clear()
+        warmup = factory()
+    return warmup
+
+
+def report_render(app_name: str, run_started: float) -> Dict[str, float]:
+    # The first completed render of the process is the cold start; every later one is a rerun
+    global _first_render
+    now = time.perf_counter()
+    with _lock:
+        cold = _first_render is None
+        if cold:
+            _first_render = now - PROCESS_STARTED
+    report = {"cold_start_ms": _first_render * 1000, "render_ms": (now - run_started) * 1000}
+    if cold:
+        print(f"{app_name} cold start: {report['cold_start_ms']:.0f} ms")
+    return report
@@ -0,0 +1,230 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.expanduser("~/.cache/cxo_agent/decks"))
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Entries used more recently than this are never evicted, so a deck returned by get() is still
+# there while the caller copies it. Kept to a few seconds (a copy takes milliseconds): every entry
+# inside the grace period is exempt from max_bytes
+EVICTION_GRACE = 5.0
+
+
+def column_hashes(frame: pd.DataFrame) -> Dict[str, str]:
+    # Content hash per column (values and row order, not dtype objects), so a changed sheet can be
+    # compared column by column against the one a cached deck was built from
+    return {
+        str(column): hashlib.sha256(pd.util.hash_pandas_object(frame[column], index=False).values.tobytes()).hexdigest()
+        for column in frame.columns
+    }
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def slide_columns(outline_slide: Dict[str, Any], slide: Dict[str, Any]) -> Optional[set]:
+    # Columns a slide depends on: what the outline planned it around plus its chart/table
+    # references. None when that cannot be told (no references at all, or literal chart/table
+    # values copied from the profile), in which case the slide depends on every column.
+    columns = {str(column) for column in outline_slide.get("columns") or []}
+    for visual in ("chart", "table"):
+        data = (slide.get(visual) or {}).get("data") or {}
+        if "categories" in data or "rows" in data:
+            return None
+        columns.update(str(column) for column in [data.get("by"), data.get("date"), data.get("value")] if column)
+        columns.update(str(column) for column in data.get("values") or [] if isinstance(column, str))
+    return columns or None
+
+
+@dataclass
+class CachedDeck:
+    key: str
+    deck_path: str
+    spec: Dict[str, Any]
+
+
+class ArtifactCache:
+    # Generated decks on local disk, content-addressed by the sheet contents, slide count, model
+    # and prompt version. Each entry keeps the .pptx and the slide spec it was rendered from
+    # (outline, raw slides, resolved slides). Entries of the same source/slides/model/prompt form
+    # a lineage whose latest entry is the base for regenerating only the slides whose columns
+    # changed. Total size is bounded by max_bytes; the least recently used entries go first.
+    def __init__(self, cache_dir: str = ARTIFACT_CACHE_DIR, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "partial_hits": 0, "misses": 0, "evictions": 0,
+                      "slides_reused": 0, "slides_regenerated": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(hashes: Dict[str, str], number_of_slides: int, model: str, prompt_version: str) -> str:
+        return _digest({"columns": hashes, "slides": int(number_of_slides), "model": model, "prompt": prompt_version})
+
+    @staticmethod
+    def lineage(source: str, number_of_slides: int, model: str, prompt_version: str) -> str:
+        return _digest({"source": source, "slides": int(number_of_slides), "model": model, "prompt": prompt_version})
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:32])
+
+    def _lineage_path(self, lineage: str) -> str:
+        return os.path.join(self.cache_dir, f"lineage-{lineage[:32]}.json")
+
+    def _read(self, key: str) -> Optional[CachedDeck]:
+        entry_dir = self._entry_dir(key)
+        deck_path = os.path.join(entry_dir, "deck.pptx")
+        try:
+            with open(os.path.join(entry_dir, "spec.json")) as file:
+                spec = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if spec.get("key") != key or not os.path.exists(deck_path):
+            return None
+        return CachedDeck(key=key, deck_path=deck_path, spec=spec)
+
+    def get(self, key: str) -> Optional[CachedDeck]:
+        with self._lock:
+            # The entry directory's mtime is its last use for LRU eviction; touching it before the
+            # read keeps evict() off the entry while the caller copies the deck
+            try:
+                os.utime(self._entry_dir(key))
+                cached = self._read(key)
+            except OSError:
+                cached = None
+            if cached is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return cached
+
+    def get_previous(self, lineage: str) -> Optional[CachedDeck]:
+        try:
+            with open(self._lineage_path(lineage)) as file:
+                return self._read(json.load(file)["key"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def affected_slides(self, previous: CachedDeck, hashes: Dict[str, str]) -> Optional[List[int]]:
+        # Indices of the slides to regenerate against a changed sheet, or None when the columns
+        # themselves changed and the outline has to be planned again
+        spec = previous.spec
+        if set(spec.get("column_hashes", {})) != set(hashes):
+            return None
+        changed = {column for column, digest in hashes.items() if spec["column_hashes"][column] != digest}
+        affected = []
+        for index, (outline_slide, slide) in enumerate(zip(spec["outline"]["slides"], spec["slides"])):
+            columns = slide_columns(outline_slide, slide)
+            if changed and (columns is None or columns & changed):
+                affected.append(index)
+        return affected
+
+    def record_partial(self, reused: int, regenerated: int):
+        with self._lock:
+            self.stats["partial_hits"] += 1
+            self.stats["slides_reused"] += reused
+            self.stats["slides_regenerated"] += regenerated
+
+    def put(self, key: str, lineage: str, deck_path: str, spec: Dict[str, Any]) -> CachedDeck:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        shutil.copyfile(deck_path, os.path.join(tmp_dir, "deck.pptx"))
+        with open(os.path.join(tmp_dir, "spec.json"), "w") as file:
+            json.dump(dict(spec, key=key), file)
+
+        with self._lock:
+            if self._read(key) is not None:
+                # Another run stored the same deck meanwhile; entries are content-addressed, so the
+                # existing one is kept and readers never see it missing
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                os.utime(entry_dir)
+            else:
+                # A broken entry is renamed away before the new one takes its name
+                self._discard(entry_dir)
+                try:
+                    os.replace(tmp_dir, entry_dir)
+                except OSError:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        lineage_tmp = f"{self._lineage_path(lineage)}.{os.getpid()}.tmp"
+        with open(lineage_tmp, "w") as file:
+            json.dump({"key": key}, file)
+        os.replace(lineage_tmp, self._lineage_path(lineage))
+
+        self.evict()
+        return CachedDeck(key=key, deck_path=os.path.join(entry_dir, "deck.pptx"), spec=spec)
+
+    @staticmethod
+    def _discard(path: str):
+        # Renamed first, so the entry disappears at once rather than file by file
+        trash = f"{path}.{os.getpid()}.{threading.get_ident()}.deleted.tmp"
+        try:
+            os.replace(path, trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def evict(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(path) or name.endswith(".tmp"):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with self._lock:
+                # Checked again under the lock: get() may have just handed this entry out
+                try:
+                    if time.time() - os.path.getmtime(path) < EVICTION_GRACE:
+                        continue
+                except OSError:
+                    continue
+                self._discard(path)
+                self.stats["evictions"] += 1
+            total -= size
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+_cache: Optional[ArtifactCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ArtifactCache()
+    return _cache
+
+
+def set_artifact_cache(cache: ArtifactCache):
+    # Lets benchmarks point the workflow at a throwaway cache directory
+    global _cache
+    _cache = cache
@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from typing import Callable, Optional
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", os.path.join(tempfile.gettempdir(), "cxo_agent_runs"))
+ARTIFACT_TTL = float(os.getenv("ARTIFACT_TTL", "3600"))
+# Expired runs are swept at most this often, from new_run()
+CLEANUP_INTERVAL = 60.0
+
+
+class ArtifactStore:
+    # Every workflow run writes its outputs into its own directory, named by a random run ID, so
+    # concurrent runs can never pick up each other's files. Files are written to a temporary name
+    # and renamed into place, so readers only ever see complete artifacts. Run directories older
+    # than ttl are removed.
+    def __init__(self, root: str = ARTIFACT_STORE_DIR, ttl: Optional[float] = ARTIFACT_TTL):
+        self.root = root
+        self.ttl = ttl
+        self._last_cleanup = 0.0
+        self._lock = threading.Lock()
+
+    def new_run(self) -> str:
+        self._maybe_cleanup()
+        run_id = uuid.uuid4().hex
+        os.makedirs(self.run_dir(run_id))
+        return run_id
+
+    def run_dir(self, run_id: str) -> str:
+        if not run_id.isalnum():
+            raise ValueError(f"Invalid run ID {run_id!r}")
+        return os.path.join(self.root, run_id)
+
+    def path(self, run_id: str, name: str) -> str:
+        return os.path.join(self.run_dir(run_id), os.path.basename(name))
+
+    @contextmanager
+    def atomic_path(self, run_id: str, name: str):
+        # Yields a temporary path to write to; it is renamed to the final name only on success
+        final_path = self.path(run_id, name)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        tmp_path = f"{final_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            yield tmp_path
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def write(self, run_id: str, name: str, writer: Callable[[str], object]) -> str:
+        with self.atomic_path(run_id, name) as tmp_path:
+            writer(tmp_path)
+        return self.path(run_id, name)
+
+    def save_file(self, run_id: str, name: str, source_path: str) -> str:
+        return self.write(run_id, name, lambda tmp_path: shutil.copyfile(source_path, tmp_path))
+
+    def read(self, path: str) -> bytes:
+        # Only files inside the store can be read back, e.g. for a download
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.root)]) != os.path.abspath(self.root):
+            raise ValueError(f"{path} is not in the artifact store")
+        with open(path, "rb") as file:
+            return file.read()
+
+    def remove(self, run_id: str):
+        shutil.rmtree(self.run_dir(run_id), ignore_errors=True)
+
+    def cleanup(self, max_age: Optional[float] = None) -> int:
+        max_age = self.ttl if max_age is None else max_age
+        if max_age is None or not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _maybe_cleanup(self):
+        with self._lock:
+            if time.monotonic() - self._last_cleanup < CLEANUP_INTERVAL:
+                return
+            self._last_cleanup = time.monotonic()
+        self.cleanup()
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore()
+    return _store
+
+
+def set_artifact_store(store: ArtifactStore):
+    # Lets benchmarks write runs to a throwaway directory
+    global _store
+    _store = store
@@ -0,0 +1,320 @@
+from mock_llm_server import DEFAULT_CONTENT, MockLLMServer
+from tool_registry import FakeToolSet, ToolRegistry, set_tool_registry
+from artifact_cache import ArtifactCache, set_artifact_cache
+from artifact_store import ArtifactStore, set_artifact_store
+from checkpoint import CheckpointStore, set_checkpoint_store
+from structured_output import extraction_stats
+from worker_pool import WorkerPool, get_worker_pool, set_worker_pool
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import numpy as np
+import resilience
+import argparse
+import asyncio
+import csv
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+FIXTURE_SHEET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sales.csv")
+BENCHMARKS = ("get_route", "sheet_id_extraction", "calender_extraction", "calender_workflow", "presentation_workflow",
+              "render_deck")
+# Full workflow runs are much slower than single calls, so they get fewer requests per level
+WORKFLOW_BENCHMARKS = ("calender_workflow", "presentation_workflow")
+COLD_IMPORT_MODULES = ("semantic_workflow_router", "calender_agent_workflow", "presentation_generator_agent_workflow")
+
+FAKE_TOOL_SCHEMAS = [
+    {
+        "name": "GOOGLECALENDAR_CREATE_EVENT",
+        "appName": "googlecalendar",
+        "description": "Create an event in Google Calendar",
+        "parameters": {
+            "properties": {"summary": {}, "start_datetime": {}, "event_duration_minutes": {}, "timezone": {}},
+            "required": ["start_datetime"],
+        },
+    },
+    {
+        "name": "GOOGLESHEETS_BATCH_GET",
+        "appName": "googlesheets",
+        "description": "Read values from a Google Sheet",
+        "parameters": {"properties": {"spreadsheet_id": {}, "ranges": {}}, "required": ["spreadsheet_id"]},
+    },
+]
+
+OUTLINE_SLIDE_COUNT_PATTERN = re.compile(r"Outline exactly (\d+) content slides")
+MOCK_SLIDE = {
+    "title": "Revenue by region",
+    "bullets": ["North leads revenue", "South trails the other regions"],
+    "chart": {"type": "column", "title": "Revenue by region", "data": {"by": "Region", "values": ["Revenue"], "agg": "sum"}},
+    "notes": "Mock slide",
+}
+
+
+def _fixture_values() -> List[List[str]]:
+    with open(FIXTURE_SHEET, newline="") as file:
+        return list(csv.reader(file))
+
+
+def fake_tool_handler(action: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    if action == "GOOGLESHEETS_BATCH_GET":
+        return {"successful": True, "data": {"valueRanges": [{"values": _fixture_values()}]}, "error": None}
+    return {"successful": True, "data": {"id": "mock-event"}, "error": None}
+
+
+def mock_respond(request: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+    # Plays the part of the model for every prompt this project sends: one tool call and a final
+    # answer for the calendar agent, outline/slide JSON for presentations, extraction JSON otherwise
+    messages = request.get("messages", [])
+    if request.get("tools"):
+        if any(message.get("role") == "tool" for message in messages):
+            return "The event has been created."
+        arguments = {"summary": "Mock meeting", "start_datetime": "2024-01-01T15:00:00", "event_duration_minutes": 60}
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": "call_mock",
+                "type": "function",
+                "function": {"name": "GOOGLECALENDAR_CREATE_EVENT", "arguments": json.dumps(arguments)},
+            }],
+        }
+
+    prompt = " ".join(str(message.get("content") or "") for message in messages)
+    slide_count = OUTLINE_SLIDE_COUNT_PATTERN.search(prompt)
+    if slide_count:
+        return json.dumps({
+            "title": "Mock deck",
+            "subtitle": "Benchmark run",
+            "slides": [
+                {"title": f"Slide {index + 1}", "focus": "Revenue by region", "columns": ["Region", "Revenue"]}
+                for index in range(int(slide_count.group(1)))
+            ],
+        })
+    if "single slide" in prompt:
+        return json.dumps(MOCK_SLIDE)
+    return DEFAULT_CONTENT
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"requests": len(latencies) + errors, "errors": errors, "elapsed": round(elapsed, 4),
+                               "throughput": round(len(latencies) / elapsed, 3) if elapsed else 0.0}
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary.update({"p50": round(float(p50), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4),
+                        "mean": round(float(np.mean(latencies)), 4), "max": round(float(max(latencies)), 4)})
+    return summary
+
+
+async def measure(call: Callable[[str], Awaitable[Any]], inputs: List[str], concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def run_one(text):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(text)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(text) for text in inputs))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def measure_cold_import(module: str) -> float:
+    # A fresh interpreter per module, so nothing is already imported or initialized
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True, capture_output=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return round(time.perf_counter() - started, 4)
+
+
+def build_calls(number_of_slides: int, workdir: str) -> Dict[str, Callable[[str], Awaitable[Any]]]:
+    # Imported here so the environment set up by run_benchmarks is in place before any client exists
+    from semantic_workflow_router import get_route
+    from pptx_renderer import render_presentation, resolve_slide
+    from sheet_profile import load_frame
+    from presentation_generator_agent_workflow import PresentationGenerationWorkflow, get_google_sheet_id_from_promot
+    from calender_agent_workflow import CalenderAgenticWorkflow, build_calender_task, get_details_from_promot
+
+    async def calender_workflow(text):
+        task = build_calender_task({"date": "2024-01-01", "timezone": "IST", "timeslot": "03:00 PM - 04:00 PM",
+                                    "intent": text})
+        return await CalenderAgenticWorkflow(timeout=120, verbose=False).run(query=task)
+
+    async def presentation_workflow(text):
+        # Same sheet every time, so the artifact cache and resuming are bypassed to measure generation
+        return await PresentationGenerationWorkflow(timeout=300, verbose=False).run(
+            google_sheet_id="1JJZdYpyEFsF-IXUa5Ek30wlNdAueICMf26BLUQLnbuU", number_of_slides=number_of_slides,
+            use_cache=False, resume=False,
+        )
+
+    deck = {"title": "Mock deck", "subtitle": "Benchmark run",
+            "slides": [resolve_slide(MOCK_SLIDE, load_frame(path=FIXTURE_SHEET))] * number_of_slides}
+
+    def render_deck(text):
+        # Rendering alone, in the worker pool when --workers is set
+        pool = get_worker_pool()
+        path = os.path.join(workdir, f"render-{text}.pptx")
+        if pool is not None:
+            return asyncio.to_thread(pool.render, deck, path)
+        return asyncio.to_thread(render_presentation, deck, None, path)
+
+    return {
+        "get_route": lambda text: asyncio.to_thread(get_route, text),
+        "sheet_id_extraction": get_google_sheet_id_from_promot,
+        "calender_extraction": get_details_from_promot,
+        "calender_workflow": calender_workflow,
+        "presentation_workflow": presentation_workflow,
+        "render_deck": render_deck,
+    }
+
+
+def make_inputs(name: str, label: str, count: int) -> List[str]:
+    # Unique text per request so the query caches never short-circuit a measurement; the
+    # extraction prompts leave out what the regex/parser fast paths could answer
+    templates = {
+        "get_route": "schedule a call with the finance team about the budget ({})",
+        "sheet_id_extraction": "make a deck from the quarterly sheet ({})",
+        "calender_extraction": "set up a sync with the design team about onboarding ({})",
+        "calender_workflow": "create_meeting on topic benchmark {}",
+        "presentation_workflow": "{}",
+        "render_deck": "{}",
+    }
+    return [templates[name].format(f"{label}-{index}") for index in range(count)]
+
+
+async def run_benchmarks(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="cxo_benchmark_")
+    report: Dict[str, Any] = {
+        "created": time.time(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "cold_imports": {},
+        "results": [],
+    }
+    if args.cold_imports:
+        for module in COLD_IMPORT_MODULES:
+            try:
+                report["cold_imports"][module] = measure_cold_import(module)
+            except subprocess.CalledProcessError as e:
+                report["cold_imports"][module] = {"error": e.stderr.decode("utf-8", "replace")[-500:]}
+
+    with MockLLMServer(latency=args.llm_latency, respond=mock_respond, failure_rate=args.llm_failure_rate,
+                       slow_rate=args.llm_slow_rate, slow_latency=args.llm_slow_latency, seed=args.seed) as mock:
+        # Must be set before the shared AsyncOpenAI client and the agents' LLM are created
+        os.environ["OPENAI_BASE_URL"] = mock.base_url
+        os.environ["OPENAI_API_BASE"] = mock.base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+        set_tool_registry(ToolRegistry(
+            toolset_factory=lambda: FakeToolSet(FAKE_TOOL_SCHEMAS, handler=fake_tool_handler, latency=args.tool_latency,
+                                                failure_rate=args.tool_failure_rate, seed=args.seed),
+            snapshot_dir=None,
+        ))
+        set_artifact_store(ArtifactStore(os.path.join(workdir, "runs"), ttl=None))
+        set_artifact_cache(ArtifactCache(os.path.join(workdir, "decks")))
+        set_checkpoint_store(CheckpointStore(os.path.join(workdir, "checkpoints.sqlite3")))
+        if args.workers:
+            # Started up front so spawning the workers and loading their models is not measured
+            set_worker_pool(WorkerPool(args.workers).start())
+        calls = build_calls(args.slides, workdir)
+
+        for name in args.benchmarks:
+            count = args.workflow_requests if name in WORKFLOW_BENCHMARKS else args.requests
+            try:
+                # The first call pays for lazy initialization (models, clients, agent pools, tools)
+                cold = await measure(calls[name], make_inputs(name, "cold", 1), 1)
+                levels = []
+                for concurrency in args.concurrency:
+                    result = await measure(calls[name], make_inputs(name, f"c{concurrency}", count), concurrency)
+                    levels.append(dict(result, concurrency=concurrency))
+                    print(f"{name:<22} concurrency={concurrency:>3}  p50={result.get('p50')}  p95={result.get('p95')}  "
+                          f"p99={result.get('p99')}  throughput={result['throughput']}/s  errors={result['errors']}",
+                          file=sys.stderr)
+                report["results"].append({"name": name, "cold": cold, "levels": levels})
+            except Exception as e:
+                # e.g. the embedding model for get_route cannot be loaded; the other benchmarks still run
+                print(f"{name}: {e}", file=sys.stderr)
+                report["results"].append({"name": name, "error": str(e)})
+
+        report["mock_llm"] = {"requests": mock.requests, "failures": mock.failures, "slow": mock.slow}
+        # Retries, hedges and breaker trips per upstream during the run
+        report["resilience"] = resilience.stats()
+        # Tokens (and prompt-cache hits), repairs and failures per structured extraction
+        report["extractions"] = extraction_stats()
+        pool = get_worker_pool()
+        if pool is not None:
+            report["worker_pool"] = dict(pool.stats, processes=pool.processes)
+            pool.stop()
+            set_worker_pool(None)
+    return report
+
+
+def find_regressions(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    # p95 per benchmark and concurrency level must stay within tolerance of the baseline run
+    previous = {
+        (result["name"], level["concurrency"]): level
+        for result in baseline.get("results", []) for level in result.get("levels", [])
+    }
+    regressions = []
+    for result in report["results"]:
+        for level in result.get("levels", []):
+            before = previous.get((result["name"], level["concurrency"]))
+            if before and before.get("p95") and level.get("p95") and level["p95"] > before["p95"] * (1 + tolerance):
+                regressions.append(f"{result['name']} at concurrency {level['concurrency']}: "
+                                   f"p95 {before['p95']}s -> {level['p95']}s")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmarks against a mock LLM and fake Composio tools")
+    parser.add_argument("--benchmarks", type=lambda text: text.split(","), default=list(BENCHMARKS))
+    parser.add_argument("--concurrency", type=lambda text: [int(level) for level in text.split(",")], default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--workflow-requests", type=int, default=8, help="requests per level for full workflow runs")
+    parser.add_argument("--slides", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="share of LLM requests that take --llm-slow-latency")
+    parser.add_argument("--llm-slow-latency", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=0, help="worker processes for embeddings and rendering")
+    parser.add_argument("--tool-latency", type=float, default=0.05)
+    parser.add_argument("--tool-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cold-imports", dest="cold_imports", action="store_false")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of a previous run to compare p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase over the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmarks(args))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+import threading
+import time
+
+AVAILABILITY_WINDOW_DAYS = 14
+AVAILABILITY_TTL = 300.0
+
+Interval = Tuple[float, float]
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        raise ValueError(f"Naive datetime {value!r}; calendar times need a timezone")
+    return value.timestamp()
+
+
+class BusyIndex:
+    # Busy blocks merged into sorted, disjoint intervals. Conflict checks are one bisect; the
+    # first free slot of a given length is found with a max segment tree over the gaps between
+    # blocks, so both are O(log n) however many events the window holds.
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        merged: List[List[float]] = []
+        for start, end in sorted((float(start), float(end)) for start, end in intervals if end > start):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+        gaps = [self.starts[index + 1] - self.ends[index] for index in range(len(merged) - 1)]
+        self._size = 1
+        while self._size < max(len(gaps), 1):
+            self._size *= 2
+        self._tree = [0.0] * (2 * self._size)
+        self._tree[self._size:self._size + len(gaps)] = gaps
+        for node in range(self._size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+        self._gap_count = len(gaps)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def union(cls, indexes: Sequence["BusyIndex"], extra: Iterable[Interval] = ()) -> "BusyIndex":
+        # Busy for anyone is busy for the group, so the common free time is the gaps of the union
+        return cls([interval for index in indexes for interval in zip(index.starts, index.ends)] + list(extra))
+
+    def conflict(self, start: float, end: float) -> Optional[Interval]:
+        # The busy block overlapping [start, end), if any
+        index = bisect_right(self.starts, start) - 1
+        if index >= 0 and self.ends[index] > start:
+            return self.starts[index], self.ends[index]
+        following = index + 1
+        if following < len(self.starts) and self.starts[following] < end:
+            return self.starts[following], self.ends[following]
+        return None
+
+    def _first_gap(self, first: int, duration: float, node: int = 1, low: int = 0, high: Optional[int] = None) -> Optional[int]:
+        # Leftmost gap index >= first that is at least `duration` long
+        high = self._size if high is None else high
+        if high <= first or self._tree[node] < duration or low >= self._gap_count:
+            return None
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self._first_gap(first, duration, 2 * node, low, middle)
+        return found if found is not None else self._first_gap(first, duration, 2 * node + 1, middle, high)
+
+    def first_free(self, duration: float, window_start: float, window_end: float) -> Optional[float]:
+        # Start of the earliest free slot of `duration` seconds inside [window_start, window_end)
+        candidate = window_start
+        index = bisect_right(self.starts, candidate) - 1
+        if index < 0 or self.ends[index] <= candidate:
+            # Free at window_start: fits if the next block starts late enough
+            following = index + 1
+            if following >= len(self.starts) or self.starts[following] - candidate >= duration:
+                return candidate if candidate + duration <= window_end else None
+            index = following
+        gap = self._first_gap(index, duration)
+        candidate = self.ends[gap] if gap is not None else self.ends[-1]
+        return candidate if candidate + duration <= window_end else None
+
+    def busy_between(self, start: float, end: float) -> List[Interval]:
+        first = max(bisect_left(self.ends, start), 0)
+        last = bisect_left(self.starts, end)
+        return list(zip(self.starts[first:last], self.ends[first:last]))
+
+
+def working_windows(window_start: float, window_end: float, zone: ZoneInfo,
+                    working_hours: Tuple[int, int]) -> List[Interval]:
+    # The window clamped to each day's working hours in zone, so a free-slot search is one
+    # first_free per day instead of merging the nights into the busy index
+    day = datetime.fromtimestamp(window_start, zone).replace(hour=0, minute=0, second=0, microsecond=0)
+    windows = []
+    while day.timestamp() < window_end:
+        next_day = (day + timedelta(days=1)).replace(hour=0)
+        opens = day.replace(hour=working_hours[0]).timestamp()
+        closes = day.replace(hour=working_hours[1]).timestamp() if working_hours[1] < 24 else next_day.timestamp()
+        if max(opens, window_start) < min(closes, window_end):
+            windows.append((max(opens, window_start), min(closes, window_end)))
+        day = next_day
+    return windows
+
+
+class FakeCalendarBackend:
+    # In-memory calendars for tests and benchmarks: user -> [(start, end, title)]
+    def __init__(self, events: Optional[Dict[str, List[Tuple[Any, Any, str]]]] = None, latency: float = 0.0):
+        self.events = {user: [(_timestamp(start), _timestamp(end), title) for start, end, title in items]
+                       for user, items in (events or {}).items()}
+        self.latency = latency
+        self.calls = {"list": 0, "create": 0}
+
+    def list_busy(self, users: Sequence[str], start: float, end: float) -> Dict[str, List[Interval]]:
+        self.calls["list"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            user: [(event_start, event_end) for event_start, event_end, _ in self.events.get(user, [])
+                   if event_start < end and event_end > start]
+            for user in users
+        }
+
+    def create_event(self, user: str, start: float, end: float, title: str) -> Dict[str, Any]:
+        self.calls["create"] += 1
+        self.events.setdefault(user, []).append((start, end, title))
+        return {"successful": True, "data": {"summary": title}, "error": None}
+
+
+def _find_busy(response: Any) -> Dict[str, List[Interval]]:
+    # Free/busy responses nest {"calendars": {calendar_id: {"busy": [{"start", "end"}]}}}
+    # differently across Composio versions; collect every "busy" list under its calendar ID
+    found: Dict[str, List[Interval]] = {}
+
+    def walk(node: Any, key: Optional[str]):
+        if isinstance(node, dict):
+            if isinstance(node.get("busy"), list):
+                found.setdefault(key or "primary", []).extend(
+                    (_timestamp(item["start"]), _timestamp(item["end"])) for item in node["busy"]
+                )
+            for child_key, child in node.items():
+                walk(child, child_key if isinstance(child, dict) and "busy" in child else key)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child, key)
+
+    walk(response, None)
+    return found
+
+
+class ComposioCalendarBackend:
+    # Google Calendar through Composio: one free/busy call covers every user and the whole window
+    def list_busy(self, users: Sequence[str], start: float, end: float) -> Dict[str, List[Interval]]:
+        from composio_llamaindex import Action
+        from tool_registry import execute_action
+
+        response = execute_action(Action.GOOGLECALENDAR_FIND_FREE_SLOTS, {
+            "time_min": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+            "time_max": datetime.fromtimestamp(end, timezone.utc).isoformat(),
+            "timezone": "UTC",
+            "items": list(users),
+        })
+        busy = _find_busy(response)
+        return {user: busy.get(user, []) for user in users}
+
+    def create_event(self, user: str, start: float, end: float, title: str) -> Dict[str, Any]:
+        from composio_llamaindex import Action
+        from tool_registry import execute_action
+
+        minutes = int((end - start) // 60)
+        return execute_action(Action.GOOGLECALENDAR_CREATE_EVENT, {
+            "calendar_id": user,
+            "summary": title,
+            "start_datetime": datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds"),
+            "event_duration_hour": minutes // 60,
+            "event_duration_minutes": minutes % 60,
+            "timezone": "UTC",
+        })
+
+
+class _CachedIndex:
+    def __init__(self, index: BusyIndex, start: float, end: float):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.loaded_at = time.monotonic()
+
+
+class AvailabilityService:
+    # Per-user busy indexes for a rolling window, fetched in one bulk call and cached until they
+    # expire (ttl), a query falls outside the cached window, or the user's calendar is written
+    # through book()/invalidate(). Answers never involve the LLM.
+    def __init__(self, backend=None, window_days: int = AVAILABILITY_WINDOW_DAYS, ttl: float = AVAILABILITY_TTL):
+        self.backend = backend or ComposioCalendarBackend()
+        self.window = window_days * 86400
+        self.ttl = ttl
+        self.stats = {"hits": 0, "fetches": 0, "invalidations": 0}
+        self._indexes: Dict[str, _CachedIndex] = {}
+        # users -> (their indexes, the union of them); reused while none of the indexes is refetched
+        self._unions: Dict[Tuple[str, ...], Tuple[List[BusyIndex], BusyIndex]] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, cached: Optional[_CachedIndex], start: float, end: float) -> bool:
+        return (cached is not None and cached.start <= start and end <= cached.end
+                and time.monotonic() - cached.loaded_at < self.ttl)
+
+    def indexes(self, users: Sequence[str], start: float, end: float) -> List[BusyIndex]:
+        with self._lock:
+            cached = {user: self._indexes.get(user) for user in users}
+        stale = [user for user in users if not self._fresh(cached[user], start, end)]
+        if stale:
+            window_start, window_end = min(start, time.time()), max(end, start + self.window)
+            busy = self.backend.list_busy(stale, window_start, window_end)
+            with self._lock:
+                self.stats["fetches"] += 1
+                for user in stale:
+                    cached[user] = self._indexes[user] = _CachedIndex(BusyIndex(busy.get(user, [])), window_start,
+                                                                      window_end)
+        with self._lock:
+            self.stats["hits"] += len(users) - len(stale)
+        return [cached[user].index for user in users]
+
+    def invalidate(self, user: str):
+        with self._lock:
+            if self._indexes.pop(user, None) is not None:
+                self.stats["invalidations"] += 1
+            for key in [key for key in self._unions if user in key]:
+                del self._unions[key]
+
+    def _group_index(self, users: Sequence[str], start: float, end: float) -> BusyIndex:
+        indexes = self.indexes(users, start, end)
+        if len(indexes) == 1:
+            return indexes[0]
+        key = tuple(users)
+        with self._lock:
+            cached = self._unions.get(key)
+        if cached is not None and all(old is new for old, new in zip(cached[0], indexes)):
+            return cached[1]
+        combined = BusyIndex.union(indexes)
+        with self._lock:
+            self._unions[key] = (indexes, combined)
+        return combined
+
+    def conflict(self, user: str, start, end) -> Optional[Interval]:
+        start, end = _timestamp(start), _timestamp(end)
+        return self.indexes([user], start, end)[0].conflict(start, end)
+
+    def find_free_slot(self, users: Sequence[str], duration_minutes: int, window_start, window_end,
+                       timezone_name: str = "UTC", working_hours: Optional[Tuple[int, int]] = (9, 18)) -> Optional[datetime]:
+        # First slot of duration_minutes that is free for every user, within working hours of
+        # timezone_name when given
+        start, end = _timestamp(window_start), _timestamp(window_end)
+        zone = ZoneInfo(timezone_name)
+        combined = self._group_index(list(users), start, end)
+        for window in working_windows(start, end, zone, working_hours) if working_hours else [(start, end)]:
+            found = combined.first_free(duration_minutes * 60, *window)
+            if found is not None:
+                return datetime.fromtimestamp(found, zone)
+        return None
+
+    def book(self, user: str, start, end, title: str) -> Dict[str, Any]:
+        response = self.backend.create_event(user, _timestamp(start), _timestamp(end), title)
+        self.invalidate(user)
+        return response
+
+
+_service: Optional[AvailabilityService] = None
+_service_lock = threading.Lock()
+
+
+def get_availability_service() -> AvailabilityService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AvailabilityService()
+    return _service
+
+
+def set_availability_service(service: AvailabilityService):
+    # Lets tests and benchmarks swap in a FakeCalendarBackend
+    global _service
+    _service = service
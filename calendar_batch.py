@@ -0,0 +1,320 @@
+from composio_llamaindex import Action
+from calendar_availability import AvailabilityService
+from calendar_prompt_parser import (
+    ISO_DATE_PATTERN, RELATIVE_DATE_PATTERN, TIME_RANGE_PATTERN, TIMEZONE_ABBREVIATIONS, TIMEZONE_PATTERN,
+    CalendarPromptParser,
+)
+from structured_output import ExtractionError, extract
+from pydantic import BaseModel, Field
+from tool_registry import execute_action
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import asyncio
+import csv
+import io
+import re
+import time
+
+BATCH_CONCURRENCY = 8
+# Composio/Google Calendar writes per second across the whole batch
+BATCH_RATE_PER_SECOND = 5.0
+TITLE_SEPARATORS = " \t-–—:,;|"
+TRAILING_PREPOSITION_PATTERN = re.compile(r"(?:\s+(?:on|at|in|for|from))+$", re.IGNORECASE)
+
+
+@dataclass
+class Slot:
+    title: str
+    start: datetime
+    end: datetime
+    timezone: str
+    attendees: List[str] = field(default_factory=list)
+    line: int = 0
+
+    def key(self) -> Tuple:
+        return " ".join(self.title.lower().split()), self.start, self.end
+
+    def to_params(self) -> Dict[str, Any]:
+        minutes = int((self.end - self.start).total_seconds() // 60)
+        params = {
+            "summary": self.title,
+            "start_datetime": self.start.replace(tzinfo=None).isoformat(timespec="seconds"),
+            "event_duration_hour": minutes // 60,
+            "event_duration_minutes": minutes % 60,
+            "timezone": self.timezone,
+        }
+        if self.attendees:
+            params["attendees"] = self.attendees
+        return params
+
+
+# Static so the provider can cache it; today's date is sent with the entries
+BATCH_PLANNING_PROMPT = """
+You convert calendar entries into structured slots. For every numbered entry return an object with
+"line" (the entry number), "date" (YYYY-MM-DD, based on today's date), "start" and "end" ("HH:MM AM/PM")
+and "title". Skip entries that are not calendar slots.
+"""
+
+
+class PlannedSlot(BaseModel):
+    line: int
+    date: str = Field(pattern=r"^\d{4}-\d{2}-\d{2}$")
+    start: str
+    end: str
+    title: str
+
+
+class PlannedSlots(BaseModel):
+    slots: List[PlannedSlot]
+
+
+@dataclass
+class BatchPlan:
+    slots: List[Slot] = field(default_factory=list)
+    duplicates: List[Slot] = field(default_factory=list)
+    # (kept slot, rejected slot) for every slot that overlaps an earlier one
+    overlaps: List[Tuple[Slot, Slot]] = field(default_factory=list)
+    # (slot, (start, end) of the existing event) for every slot the calendar is already busy for
+    conflicts: List[Tuple[Slot, Tuple[datetime, datetime]]] = field(default_factory=list)
+
+
+class RateLimiter:
+    # Token bucket shared by every booking task of a batch
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(int(rate), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _zone(timezone: str) -> ZoneInfo:
+    return ZoneInfo(TIMEZONE_ABBREVIATIONS.get(timezone, timezone))
+
+
+def _parse_clock(text: str) -> Tuple[int, int]:
+    parsed = datetime.strptime(" ".join(text.upper().replace(".", ":").split()), "%I:%M %p")
+    return parsed.hour, parsed.minute
+
+
+def _make_slot(title: str, day: str, start: str, end: str, timezone: str, attendees: List[str], line: int) -> Slot:
+    zone = _zone(timezone)
+    slot_date = date.fromisoformat(day)
+    (start_hour, start_minute), (end_hour, end_minute) = _parse_clock(start), _parse_clock(end)
+    start_time = datetime(slot_date.year, slot_date.month, slot_date.day, start_hour, start_minute, tzinfo=zone)
+    end_time = start_time.replace(hour=end_hour, minute=end_minute)
+    if end_time <= start_time:
+        # "11:00 PM - 12:30 AM" ends the next day
+        end_time += timedelta(days=1)
+    return Slot(title=title.strip() or "Busy", start=start_time, end=end_time, timezone=timezone,
+                attendees=attendees, line=line)
+
+
+def slot_from_details(details: Dict[str, Any], default_timezone: str = "UTC") -> Optional[Slot]:
+    # The slot a parsed prompt asks for; None when its date or time range is missing or unreadable
+    if not details.get("date") or not details.get("timeslot"):
+        return None
+    try:
+        start, end = details["timeslot"].split(" - ")
+        return _make_slot(details.get("intent") or "", details["date"], start, end,
+                          details.get("timezone") or default_timezone, [], 0)
+    except (ValueError, ZoneInfoNotFoundError):
+        return None
+
+
+def _title_from_line(text: str) -> str:
+    # "1:30 AM - 2:30 AM - Meeting with Aakash": the title is what follows the time range, minus
+    # any date or timezone the parser already took from the line
+    match = TIME_RANGE_PATTERN.search(text.lower())
+    if match:
+        text = text[match.end():].strip(TITLE_SEPARATORS) or text[:match.start()]
+    text = TIMEZONE_PATTERN.sub(" ", text)
+    # The date patterns are written for lowercased text
+    for pattern in (ISO_DATE_PATTERN, RELATIVE_DATE_PATTERN):
+        text = re.sub(pattern.pattern, " ", text, flags=re.IGNORECASE)
+    text = TRAILING_PREPOSITION_PATTERN.sub("", " ".join(text.split()))
+    return text.strip(TITLE_SEPARATORS)
+
+
+def _is_csv(text: str) -> bool:
+    header = next((line for line in text.splitlines() if line.strip()), "").lower()
+    return "," in header and "start" in header
+
+
+def parse_slots(text: str, default_date: Optional[date] = None, default_timezone: str = "UTC",
+                parser: Optional[CalendarPromptParser] = None) -> Tuple[List[Slot], List[Tuple[int, str, str]]]:
+    # Parses one slot per line ("<time range> - <title>", optionally with a date/timezone) or a CSV
+    # with date,start,end,title[,timezone,attendees] columns, without calling the LLM. Returns the
+    # slots and (line number, line, reason) for everything that could not be resolved.
+    parser = parser or CalendarPromptParser()
+    default_date = default_date or date.today()
+    slots, invalid = [], []
+
+    if _is_csv(text):
+        for number, row in enumerate(csv.DictReader(io.StringIO(text.strip())), start=2):
+            row = {str(key).strip().lower(): (value or "").strip() for key, value in row.items() if key}
+            title = row.get("title") or row.get("summary") or row.get("topic") or ""
+            try:
+                slots.append(_make_slot(
+                    title, row.get("date") or default_date.isoformat(), row["start"], row["end"],
+                    row.get("timezone") or default_timezone,
+                    [email.strip() for email in re.split(r"[;\s]+", row.get("attendees", "")) if email.strip()],
+                    number,
+                ))
+            except (KeyError, ValueError, ZoneInfoNotFoundError) as e:
+                invalid.append((number, ",".join(row.values()), str(e)))
+        return slots, invalid
+
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        details = parser.parse(line)
+        if not details["timeslot"]:
+            invalid.append((number, line, "no time range found"))
+            continue
+        start, end = details["timeslot"].split(" - ")
+        try:
+            slots.append(_make_slot(_title_from_line(line), details["date"] or default_date.isoformat(), start, end,
+                                    details["timezone"] or default_timezone, [], number))
+        except (ValueError, ZoneInfoNotFoundError) as e:
+            invalid.append((number, line, str(e)))
+    return slots, invalid
+
+
+async def plan_unresolved(invalid: List[Tuple[int, str, str]], default_date: date, default_timezone: str,
+                          model: str = "gpt-4o-2024-08-06") -> Tuple[List[Slot], List[Tuple[int, str, str]]]:
+    # The only LLM involvement: one call for every line the parser could not resolve
+    if not invalid:
+        return [], []
+    lines = {number: line for number, line, _ in invalid}
+    try:
+        planned = await extract("batch_slots", PlannedSlots, BATCH_PLANNING_PROMPT, (
+            f"Today's date: {default_date.isoformat()} ({default_date.strftime('%A')})\n"
+            + "\n".join(f"{number}. {line}" for number, line in lines.items())
+        ), llm=model)
+    except ExtractionError:
+        return [], invalid
+
+    slots, resolved = [], set()
+    for item in planned.slots:
+        if item.line not in lines:
+            continue
+        try:
+            slots.append(_make_slot(item.title, item.date, item.start, item.end, default_timezone, [], item.line))
+            resolved.add(item.line)
+        except (ValueError, ZoneInfoNotFoundError):
+            continue
+    return slots, [entry for entry in invalid if entry[0] not in resolved]
+
+
+def validate_slots(slots: List[Slot], allow_overlaps: bool = False) -> BatchPlan:
+    # Drops exact duplicates (same title and times), then rejects every slot that overlaps an
+    # earlier kept one; one pass over the slots sorted by start time
+    plan = BatchPlan()
+    seen = set()
+    unique = []
+    for slot in slots:
+        if slot.key() in seen:
+            plan.duplicates.append(slot)
+            continue
+        seen.add(slot.key())
+        unique.append(slot)
+
+    latest: Optional[Slot] = None
+    for slot in sorted(unique, key=lambda slot: (slot.start, slot.end)):
+        if latest is not None and slot.start < latest.end and not allow_overlaps:
+            plan.overlaps.append((latest, slot))
+            continue
+        plan.slots.append(slot)
+        if latest is None or slot.end > latest.end:
+            latest = slot
+    return plan
+
+
+def check_calendar(plan: BatchPlan, availability: AvailabilityService, user: str = "primary") -> BatchPlan:
+    # Rejects slots that collide with events already on the calendar, from the cached busy index
+    # (one bulk fetch for the batch's window) instead of one lookup per slot
+    if not plan.slots:
+        return plan
+    window_start = min(slot.start for slot in plan.slots)
+    index = availability.indexes([user], window_start.timestamp(), max(slot.end for slot in plan.slots).timestamp())[0]
+    free = []
+    for slot in plan.slots:
+        busy = index.conflict(slot.start.timestamp(), slot.end.timestamp())
+        if busy is None:
+            free.append(slot)
+        else:
+            zone = slot.start.tzinfo
+            plan.conflicts.append((slot, (datetime.fromtimestamp(busy[0], zone), datetime.fromtimestamp(busy[1], zone))))
+    plan.slots = free
+    return plan
+
+
+async def book_slots(slots: List[Slot], concurrency: int = BATCH_CONCURRENCY,
+                     rate_per_second: float = BATCH_RATE_PER_SECOND) -> List[Dict[str, Any]]:
+    # Direct GOOGLECALENDAR_CREATE_EVENT calls, no agent: at most `concurrency` in flight and at
+    # most rate_per_second started per second
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate_per_second)
+
+    async def book(slot: Slot) -> Dict[str, Any]:
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                response = await asyncio.to_thread(execute_action, Action.GOOGLECALENDAR_CREATE_EVENT, slot.to_params())
+            except Exception as e:
+                return {"slot": slot, "successful": False, "error": str(e), "response": None}
+            # Older Composio versions spell the flag "successfull"
+            successful = response.get("successful", response.get("successfull", True)) if isinstance(response, dict) else True
+            error = response.get("error") if isinstance(response, dict) else None
+            return {"slot": slot, "successful": bool(successful), "error": error, "response": response}
+
+    return await asyncio.gather(*(book(slot) for slot in slots))
+
+
+async def book_batch(text: str, default_date: Optional[date] = None, default_timezone: str = "UTC",
+                     use_llm: bool = True, allow_overlaps: bool = False, concurrency: int = BATCH_CONCURRENCY,
+                     rate_per_second: float = BATCH_RATE_PER_SECOND,
+                     availability: Optional[AvailabilityService] = None, user: str = "primary") -> Dict[str, Any]:
+    default_date = default_date or date.today()
+    started = time.perf_counter()
+    try:
+        _zone(default_timezone)
+    except (ValueError, ZoneInfoNotFoundError):
+        # Reported once, rather than as the reason every line without its own timezone failed
+        return {"plan": BatchPlan(), "invalid": [], "results": [], "booked": 0, "failed": 0,
+                "elapsed": time.perf_counter() - started, "error": f"Unknown timezone {default_timezone!r}"}
+    slots, invalid = parse_slots(text, default_date, default_timezone)
+    if use_llm and invalid and not _is_csv(text):
+        planned, invalid = await plan_unresolved(invalid, default_date, default_timezone)
+        slots += planned
+
+    plan = validate_slots(slots, allow_overlaps=allow_overlaps)
+    if availability is not None and not allow_overlaps:
+        plan = await asyncio.to_thread(check_calendar, plan, availability, user)
+    results = await book_slots(plan.slots, concurrency=concurrency, rate_per_second=rate_per_second)
+    if availability is not None and any(result["successful"] for result in results):
+        # The calendar changed underneath the cached index
+        availability.invalidate(user)
+    return {
+        "plan": plan,
+        "invalid": invalid,
+        "results": results,
+        "booked": sum(result["successful"] for result in results),
+        "failed": sum(not result["successful"] for result in results),
+        "elapsed": time.perf_counter() - started,
+        "error": None,
+    }
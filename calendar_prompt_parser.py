@@ -0,0 +1,245 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import re
+
+FIELDS = ("date", "timezone", "timeslot", "intent")
+
+# Abbreviation -> IANA zone; the abbreviation itself is what ends up in the "timezone" field
+TIMEZONE_ABBREVIATIONS = {
+    "IST": "Asia/Kolkata",
+    "UTC": "UTC",
+    "GMT": "Etc/GMT",
+    "BST": "Europe/London",
+    "CET": "Europe/Paris",
+    "CEST": "Europe/Paris",
+    "EET": "Europe/Athens",
+    "EST": "America/New_York",
+    "EDT": "America/New_York",
+    "CST": "America/Chicago",
+    "CDT": "America/Chicago",
+    "MST": "America/Denver",
+    "MDT": "America/Denver",
+    "PST": "America/Los_Angeles",
+    "PDT": "America/Los_Angeles",
+    "SGT": "Asia/Singapore",
+    "JST": "Asia/Tokyo",
+    "AEST": "Australia/Sydney",
+    "AEDT": "Australia/Sydney",
+}
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+          "november", "december"]
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+                "ten": 10, "eleven": 11, "twelve": 12}
+
+_WEEKDAY = r"(?P<weekday>monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_MONTH = r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+_COUNT = r"(?P<count>\d+|" + "|".join(NUMBER_WORDS) + r")"
+_TIME = r"(?:\d{1,2}(?:[:.]\d{2})?(?::\d{2})?\s*(?:[ap]\.?m\.?)?|noon|midnight)"
+
+TIMEZONE_PATTERN = re.compile(
+    r"\b(?P<iana>[A-Z][a-z]+/[A-Z][A-Za-z_]+(?:/[A-Z][A-Za-z_]+)?)\b|\b(?P<abbr>" + "|".join(TIMEZONE_ABBREVIATIONS) + r")\b"
+)
+RECURRENCE_PATTERN = re.compile(
+    r"\b(?:(?:next|following|coming)\s+" + _COUNT + r"\s+" + _WEEKDAY + r"s\b|every\s+(?P<every>monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b)"
+)
+ISO_DATE_PATTERN = re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b")
+DAY_MONTH_PATTERN = re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r"\b(?:,?\s+(?P<year>\d{4}))?")
+MONTH_DAY_PATTERN = re.compile(r"\b" + _MONTH + r"\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(?P<year>\d{4}))?")
+RELATIVE_DATE_PATTERN = re.compile(
+    r"\b(?P<word>day after tomorrow|tomorrow|today|tonight|yesterday)\b|\bin\s+" + _COUNT + r"\s+days?\b"
+)
+WEEKDAY_PATTERN = re.compile(r"\b(?:(?P<qualifier>this|next|coming|on)\s+)?" + _WEEKDAY + r"\b")
+TIME_RANGE_PATTERN = re.compile(
+    r"(?:\bfrom\s+)?\b(?P<start>" + _TIME + r")\s*(?:-|–|to|till|until)\s*(?P<end>" + _TIME + r")(?![\w/])"
+)
+SINGLE_TIME_PATTERN = re.compile(r"\b(?:at|@)\s*(?P<start>" + _TIME + r")(?![\w/])|\b(?P<bare>\d{1,2}(?:[:.]\d{2})?\s*[ap]\.?m\.?)")
+DURATION_PATTERN = re.compile(r"\bfor\s+(?:an?\s+|(?P<count>\d+(?:\.\d+)?|" + "|".join(NUMBER_WORDS) + r")\s+)(?P<unit>hours?|hrs?|minutes?|mins?)\b")
+INTENT_PATTERNS = [
+    ("cancel_meeting", re.compile(r"\b(?:cancel|delete|remove|drop)\b")),
+    ("reschedule_meeting", re.compile(r"\b(?:reschedule|move|postpone|push|shift)\b")),
+]
+# Names and topics also end where a time ("11pm", "10:30") starts
+_PHRASE_END = (r"(?=\s+(?:tomorrow|today|tonight|on|at|from|next|this|every|for|in|to|with|about|regarding)\b"
+               r"|\s+(?:\d{1,2}(?:[:.]\d{2})?\s*[ap]\.?m\b|\d{1,2}[:.]\d{2}\b|noon\b|midnight\b)|[,;]|\.(?!\d)|$)")
+# Matched against the original text so names and topics keep their casing
+WITH_PATTERN = re.compile(r"\bwith\s+(?P<who>.+?)" + _PHRASE_END, re.IGNORECASE)
+TOPIC_PATTERN = re.compile(r"\b(?:on\s+(?:the\s+)?topic|about|regarding|to discuss)\s+(?P<topic>.+?)" + _PHRASE_END,
+                           re.IGNORECASE)
+
+
+def _to_int(value: str) -> int:
+    return int(value) if value.isdigit() else NUMBER_WORDS[value]
+
+
+def _month_number(name: str) -> int:
+    return next(index for index, month in enumerate(MONTHS, start=1) if month.startswith(name[:3]))
+
+
+def _next_weekday(start: date, weekday: int, include_start: bool = False) -> date:
+    days = (weekday - start.weekday()) % 7
+    if days == 0 and not include_start:
+        days = 7
+    return start + timedelta(days=days)
+
+
+def _parse_time(text: str, meridiem: Optional[str] = None) -> Optional[Tuple[int, int, Optional[str]]]:
+    text = text.strip().lower()
+    if text == "noon":
+        return 12, 0, "pm"
+    if text == "midnight":
+        return 0, 0, "am"
+    match = re.fullmatch(r"(\d{1,2})(?:[:.](\d{2}))?(?::\d{2})?\s*([ap])?\.?(?:m\.?)?", text)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    own = f"{match.group(3)}m" if match.group(3) else None
+    marker = own or meridiem
+    if hour > 23 or minute > 59:
+        return None
+    if marker and hour <= 12:
+        hour = hour % 12 + (12 if marker == "pm" else 0)
+    return hour, minute, own
+
+
+def _format_time(minutes: int) -> str:
+    return (datetime(2000, 1, 1) + timedelta(minutes=minutes)).strftime("%I:%M %p")
+
+
+class CalendarPromptParser:
+    # Resolves the fields get_details_from_promot needs from the common phrasings of calendar
+    # requests. Anything it cannot resolve is left as None so only those fields go to the LLM.
+    def __init__(self, default_duration_minutes: int = 60):
+        self.default_duration_minutes = default_duration_minutes
+
+    def parse(self, text: str, today: Optional[date] = None) -> Dict[str, Any]:
+        lowered = text.lower()
+        timezone = self._parse_timezone(text)
+        if today is None:
+            today = datetime.now(self._zone(timezone)).date()
+
+        details: Dict[str, Any] = dict.fromkeys(FIELDS)
+        details["timezone"] = timezone or ""
+        recurrence = self._parse_recurrence(lowered, today)
+        if recurrence:
+            details["date"] = recurrence["dates"][0] if recurrence["dates"] else None
+            details["recurrence"] = recurrence
+        else:
+            details["date"] = self._parse_date(lowered, today)
+        details["timeslot"] = self._parse_timeslot(lowered)
+        details["intent"] = self._parse_intent(text)
+        details["sources"] = {field: "rules" for field in FIELDS if details[field] is not None}
+        return details
+
+    @staticmethod
+    def _zone(timezone: Optional[str]):
+        try:
+            return ZoneInfo(TIMEZONE_ABBREVIATIONS.get(timezone, timezone)) if timezone else None
+        except (ZoneInfoNotFoundError, ValueError):
+            return None
+
+    def _parse_timezone(self, text: str) -> Optional[str]:
+        for match in TIMEZONE_PATTERN.finditer(text):
+            if match.group("abbr"):
+                return match.group("abbr")
+            if self._zone(match.group("iana")):
+                return match.group("iana")
+        return None
+
+    @staticmethod
+    def _parse_recurrence(text: str, today: date) -> Optional[Dict[str, Any]]:
+        match = RECURRENCE_PATTERN.search(text)
+        if not match:
+            return None
+        weekday = match.group("weekday") or match.group("every")
+        count = _to_int(match.group("count")) if match.group("count") else None
+        first = _next_weekday(today, WEEKDAYS.index(weekday), include_start=False)
+        dates: List[str] = [(first + timedelta(weeks=week)).isoformat() for week in range(count or 1)]
+        return {"weekday": weekday.capitalize(), "count": count, "dates": dates}
+
+    @staticmethod
+    def _parse_date(text: str, today: date) -> Optional[str]:
+        match = ISO_DATE_PATTERN.search(text)
+        if match:
+            try:
+                return date(int(match.group("year")), int(match.group("month")), int(match.group("day"))).isoformat()
+            except ValueError:
+                return None
+
+        match = DAY_MONTH_PATTERN.search(text) or MONTH_DAY_PATTERN.search(text)
+        if match:
+            month, day = _month_number(match.group("month")), int(match.group("day"))
+            try:
+                if match.group("year"):
+                    return date(int(match.group("year")), month, day).isoformat()
+                # Without a year, the next occurrence of that day
+                candidate = date(today.year, month, day)
+                return (candidate if candidate >= today else date(today.year + 1, month, day)).isoformat()
+            except ValueError:
+                return None
+
+        match = RELATIVE_DATE_PATTERN.search(text)
+        if match:
+            offsets = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2, "yesterday": -1}
+            offset = offsets[match.group("word")] if match.group("word") else _to_int(match.group("count"))
+            return (today + timedelta(days=offset)).isoformat()
+
+        match = WEEKDAY_PATTERN.search(text)
+        if match:
+            weekday = WEEKDAYS.index(match.group("weekday"))
+            if match.group("qualifier") == "next":
+                # "next Friday" is the Friday of next week
+                monday = today + timedelta(days=7 - today.weekday())
+                return (monday + timedelta(days=weekday)).isoformat()
+            return _next_weekday(today, weekday, include_start=match.group("qualifier") == "this").isoformat()
+        return None
+
+    def _parse_timeslot(self, text: str) -> Optional[str]:
+        # Date fragments like "10-20" also look like ranges, so keep scanning until one validates
+        for match in TIME_RANGE_PATTERN.finditer(text):
+            end = _parse_time(match.group("end"))
+            start = _parse_time(match.group("start"), meridiem=end[2] if end else None)
+            if start and end and (start[2] or end[2] or ":" in match.group(0) or "." in match.group(0)):
+                start_minutes, end_minutes = start[0] * 60 + start[1], end[0] * 60 + end[1]
+                # "11 to 1 PM": the start borrowed PM from the end but must be AM
+                if start[2] is None and end[2] == "pm" and start_minutes > end_minutes:
+                    start_minutes -= 12 * 60
+                # An end at or before the start ("11pm to 1am") runs past midnight, as _make_slot in
+                # calendar_batch reads it; only an empty range is rejected
+                if end_minutes != start_minutes:
+                    return f"{_format_time(start_minutes)} - {_format_time(end_minutes)}"
+
+        match = SINGLE_TIME_PATTERN.search(text)
+        if match:
+            start = _parse_time(match.group("start") or match.group("bare"))
+            if start and (start[2] or match.group("start") in ("noon", "midnight")):
+                start_minutes = start[0] * 60 + start[1]
+                return f"{_format_time(start_minutes)} - {_format_time(start_minutes + self._parse_duration(text))}"
+        return None
+
+    def _parse_duration(self, text: str) -> int:
+        match = DURATION_PATTERN.search(text)
+        if not match:
+            return self.default_duration_minutes
+        count = match.group("count")
+        amount = 1.0 if count is None else float(NUMBER_WORDS.get(count, count))
+        return int(amount * (60 if match.group("unit").startswith("h") else 1))
+
+    @staticmethod
+    def _parse_intent(text: str) -> Optional[str]:
+        action = next((name for name, pattern in INTENT_PATTERNS if pattern.search(text.lower())), "create_meeting")
+        who = WITH_PATTERN.search(text)
+        topic = TOPIC_PATTERN.search(text)
+        parts = [action]
+        if who:
+            parts.append(f"with {who.group('who').strip()}")
+        if topic:
+            parts.append(f"on topic {topic.group('topic').strip()}")
+        # An action without a person or topic is too vague to label the event with
+        return " ".join(parts) if len(parts) > 1 else None
+
+
+def parse_calendar_prompt(text: str, today: Optional[date] = None) -> Dict[str, Any]:
+    return CalendarPromptParser().parse(text, today=today)
@@ -1,22 +1,30 @@
 import streamlit as st
 import dotenv
-from composio_llamaindex import App, ComposioToolSet
-from llama_index.core.agent import FunctionCallingAgentWorker
-from llama_index.core.llms import ChatMessage
-from llama_index.llms.openai import OpenAI
 from datetime import datetime
-from llama_index.core import Settings
+from app_startup import Warmup, current_warmup, report_render
+import time
+
+run_started = time.perf_counter()
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
-Settings.llm = OpenAI(model="gpt-4o")
-llm = OpenAI(model="gpt-4o")
 
-# Initialize the ComposioToolSet
-toolset = ComposioToolSet()
 
-# Get the RAG tool from the Composio ToolSet
-tools = toolset.get_tools(apps=[App.GOOGLECALENDAR])
+@st.cache_resource(show_spinner=False)
+def calender_agent_warmup() -> Warmup:
+    # llama-index, composio and the agent (with its tool schemas) load once per process, in the
+    # background, instead of on every rerun of this script
+    def load():
+        from calender_agent_workflow import get_calender_agent_pool
+
+        pool = get_calender_agent_pool()
+        pool.warm(1)
+        return pool
+
+    return Warmup("calender_agent", load)
+
+
+warmup = current_warmup(calender_agent_warmup)
 
 # Streamlit UI
 st.title("Google Calendar Scheduling Agent")
@@ -30,42 +38,86 @@ date = st.date_input("Select the date for scheduling:", value=datetime.today())
 
 # Button to execute the action
 if st.button("Book Slots"):
-    # Define the RAG Agent
-    prefix_messages = [
-        ChatMessage(
-            role="system",
-            content=(
-                """
-                You are an AI agent responsible for taking actions on Google Calendar on users' behalf. 
-                You need to take action on Calendar using Google Calendar APIs. Use correct tools to run APIs from the given tool-set.
-                """
-            ),
-        )
-    ]
-
-    # Initialize a FunctionCallingAgentWorker with the tools, LLM, and system messages
-    agent = FunctionCallingAgentWorker(
-        tools=tools,  # Tools available for the agent to use
-        llm=llm,  # Language model for processing requests
-        prefix_messages=prefix_messages,  # Initial system messages for context
-        max_function_calls=10,  # Maximum number of function calls allowed
-        allow_parallel_tool_calls=False,  # Disallow parallel tool calls
-        verbose=True,  # Enable verbose output
-    ).as_agent()
+    from events import LLMTokenEvent
+    from progress import format_progress, progress_sink
 
     # Convert date and timezone to string for the agent
     date_str = date.strftime("%Y-%m-%d")
 
     # {todo.split("-")[0]} to {todo.split("-")[1]} on topic {todo.split("-")[2]}
-    response = agent.chat(
-        f"""
+    task = f"""
         Book slots from {todo.split("-")[0]} to {todo.split("-")[1]} on topic {todo.split("-")[2]}. 
         Properly label them with the work provided to be done in that time period. 
         Schedule it for today. Today's date is {date_str} (it's in YYYY-MM-DD format) 
         and make the timezone be {timezone}.
         """
-    )
+    with st.status("Booking slots...", expanded=True) as status:
+        # Agent output is shown as it arrives, tool calls as one line each
+        agent_output = st.empty()
+        agent_text = []
+
+        def render(event):
+            if isinstance(event, LLMTokenEvent):
+                agent_text.append(event.delta)
+                agent_output.markdown("".join(agent_text)[-2000:])
+                return
+            message = format_progress(event)
+            if message:
+                status.write(message)
+
+        if not warmup.ready:
+            status.write("Loading the agent...")
+        with warmup.result().checkout() as agent, progress_sink(render):
+            response = agent.chat(task)
+        status.update(label="Slots booked", state="complete", expanded=False)
 
     # Display the response
     st.subheader("Response from the Agent")
     st.write(response)
+
+# Batch mode: every slot is parsed locally and booked with a direct tool call, no agent run
+st.subheader("Book Many Slots")
+batch_text = st.text_area(
+    "One slot per line (e.g., 10:00 AM - 11:00 AM - Design review) or CSV with date,start,end,title columns:"
+)
+batch_file = st.file_uploader("...or upload a CSV file", type=["csv"])
+
+if st.button("Book All Slots"):
+    import asyncio
+    from calendar_availability import get_availability_service
+    from calendar_batch import book_batch
+
+    text = batch_file.getvalue().decode("utf-8") if batch_file is not None else batch_text
+    with st.status("Booking slots...", expanded=True) as status:
+        result = asyncio.run(book_batch(text, default_date=date, default_timezone=str(timezone),
+                                        availability=get_availability_service()))
+        plan = result["plan"]
+        if result["error"]:
+            status.write(result["error"])
+        for slot in plan.duplicates:
+            status.write(f"Skipped duplicate on line {slot.line}: {slot.title}")
+        for kept, rejected in plan.overlaps:
+            status.write(f"Skipped line {rejected.line} ({rejected.title}): overlaps line {kept.line} ({kept.title})")
+        for slot, (busy_start, busy_end) in plan.conflicts:
+            status.write(f"Skipped line {slot.line} ({slot.title}): calendar is busy "
+                         f"{busy_start.strftime('%I:%M %p')} - {busy_end.strftime('%I:%M %p')}")
+        for line, text_line, reason in result["invalid"]:
+            status.write(f"Could not read line {line} ({text_line}): {reason}")
+        status.update(
+            label=f"Booked {result['booked']} of {len(plan.slots)} slots in {result['elapsed']:.1f}s",
+            state="complete" if not result["failed"] and not result["error"] else "error",
+        )
+
+    st.dataframe([
+        {
+            "title": booking["slot"].title,
+            "start": booking["slot"].start.strftime("%Y-%m-%d %I:%M %p"),
+            "end": booking["slot"].end.strftime("%Y-%m-%d %I:%M %p"),
+            "booked": booking["successful"],
+            "error": booking["error"] or "",
+        }
+        for booking in result["results"]
+    ], use_container_width=True)
+
+timings = report_render("calender_agent_main", run_started)
+st.caption(f"Cold start {timings['cold_start_ms']:.0f} ms · this run {timings['render_ms']:.0f} ms")
@@ -4,124 +4,203 @@ from llama_index.core.workflow import (
     Workflow,
     step, Context
 )
-from composio_llamaindex import App, ComposioToolSet
+from composio_llamaindex import App
 from llama_index.core.agent import FunctionCallingAgentWorker
 from llama_index.core.llms import ChatMessage
 from llama_index.llms.openai import OpenAI
-from datetime import datetime
-from llama_index.utils.workflow import draw_all_possible_flows
-from events import PrefixMessageEvent, AgentEvent
+from datetime import date, datetime, timedelta
+from events import PrefixMessageEvent, AgentEvent, StatusEvent
+from progress import format_progress, progress_sink
+from query_cache import QueryCache, cached
+from calendar_availability import get_availability_service
+from calendar_batch import Slot, slot_from_details
+from calendar_prompt_parser import FIELDS, parse_calendar_prompt
+from tool_registry import get_tools
+from llm_clients import LLM_MAX_RETRIES, LLM_TIMEOUT
+from structured_output import extract, extraction_stats
+from pydantic import BaseModel, Field
+from typing import Optional, Union
+from resilience import WorkflowDeadline
+from tracing import traced_step
+from agent_pool import AgentPool, get_agent_pool
+import asyncio
 import dotenv
-import openai
 import json
+import tracing
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
+WORKFLOW_TIMEOUT = 300.0
 
-class CalenderAgenticWorkflow(Workflow):
-    @step
-    async def initialize(self, ev: StartEvent, ctx: Context) -> PrefixMessageEvent:
-        # Initialize the LLM
-        llm = OpenAI(model="gpt-4o")
-
-        # Initialize the ComposioToolSet
-        toolset = ComposioToolSet()
-
-        # Get the RAG tool from the Composio ToolSet
-        tools = toolset.get_tools(apps=[App.GOOGLECALENDAR])
-
-        # Define the prefix message for Agent
-        prefix_messages = [
-            ChatMessage(
-                role="system",
-                content=(
-                    """
-                    You are an AI agent responsible for taking actions on Google Calendar on users' behalf. 
-                    You need to take action on Calendar using Google Calendar APIs. Use correct tools to run APIs from the given tool-set.
-                    """
-                ),
-            )
-        ]
 
-        await ctx.set("query", ev.query)
-        await ctx.set("tools", tools)
-        await ctx.set("llm", llm)
+# Define the prefix message for Agent
+PREFIX_MESSAGES = [
+    ChatMessage(
+        role="system",
+        content=(
+            """
+            You are an AI agent responsible for taking actions on Google Calendar on users' behalf. 
+            You need to take action on Calendar using Google Calendar APIs. Use correct tools to run APIs from the given tool-set.
+            """
+        ),
+    )
+]
 
-        return PrefixMessageEvent(prefix_messages=prefix_messages)
 
-    @step
-    async def create_agent(self, ev: PrefixMessageEvent, ctx: Context) -> AgentEvent:
-        tools = await ctx.get("tools")
-        llm = await ctx.get("llm")
-        prefix_messages = ev.prefix_messages
+def get_calender_agent_pool(model: str = "gpt-4o") -> AgentPool:
+    # Every agent in the pool shares one LLM, and with it one HTTP client to the provider
+    llm = None
+
+    def build_agent():
+        nonlocal llm
+        llm = llm or OpenAI(model=model, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
 
         # Initialize a FunctionCallingAgentWorker with the tools, LLM, and system messages
-        agent = FunctionCallingAgentWorker(
-            tools=tools,  # Tools available for the agent to use
+        return FunctionCallingAgentWorker(
+            tools=get_tools(apps=[App.GOOGLECALENDAR]),  # Tools available for the agent to use
             llm=llm,  # Language model for processing requests
-            prefix_messages=prefix_messages,  # Initial system messages for context
+            prefix_messages=PREFIX_MESSAGES,  # Initial system messages for context
             max_function_calls=10,  # Maximum number of function calls allowed
             allow_parallel_tool_calls=False,  # Disallow parallel tool calls
             verbose=True,  # Enable verbose output
         ).as_agent()
 
+    return get_agent_pool(("calender", model), build_agent)
+
+
+def check_requested_slot(slot: Slot, user: str = "primary") -> Optional[str]:
+    # Why the slot cannot be booked (with the next free one), or None when the calendar is free
+    service = get_availability_service()
+    busy = service.conflict(user, slot.start, slot.end)
+    if busy is None:
+        return None
+    zone = slot.start.tzinfo
+    busy_start, busy_end = (datetime.fromtimestamp(stamp, zone) for stamp in busy)
+    message = f"The calendar is busy {busy_start.strftime('%I:%M %p')} - {busy_end.strftime('%I:%M %p')}"
+    minutes = int((slot.end - slot.start).total_seconds() // 60)
+    free = service.find_free_slot([user], minutes, slot.start, slot.start + timedelta(days=1), zone.key,
+                                  working_hours=None)
+    if free is None:
+        return f"{message}; there is no free {minutes}-minute slot in the next day."
+    return f"{message}; the next free {minutes}-minute slot starts at {free.strftime('%Y-%m-%d %I:%M %p')}."
+
+
+class CalenderAgenticWorkflow(WorkflowDeadline, Workflow):
+    @step
+    @traced_step
+    async def initialize(self, ev: StartEvent, ctx: Context) -> Union[PrefixMessageEvent, StopEvent]:
+        ctx.write_event_to_stream(StatusEvent(message="Preparing the calendar agent"))
+        await ctx.set("query", ev.query)
+        # With the parsed details the requested slot is checked against the cached busy index
+        # before the agent (and its create-event call) runs at all
+        slot = slot_from_details(ev.get("details") or {})
+        if slot is not None:
+            try:
+                conflict = await asyncio.to_thread(check_requested_slot, slot)
+            except Exception as e:
+                print(f"Could not check availability: {e}")
+                conflict = None
+            if conflict:
+                return StopEvent(result=conflict)
+        return PrefixMessageEvent(prefix_messages=PREFIX_MESSAGES)
+
+    @step
+    @traced_step
+    async def create_agent(self, ev: PrefixMessageEvent, ctx: Context) -> AgentEvent:
+        # Pooled agents already have the tools, LLM and prefix messages bound
+        agent = get_calender_agent_pool().acquire()
         return AgentEvent(agent=agent)
 
     @step
+    @traced_step
     async def run_agent(self, ev: AgentEvent, ctx: Context) -> StopEvent:
         agent = ev.agent
         query = await ctx.get("query")
-        response = agent.chat(query)
+        ctx.write_event_to_stream(StatusEvent(message="Agent is working on the request"))
+        try:
+            # Tool calls and LLM output inside the agent run are streamed as progress events
+            with progress_sink(ctx.write_event_to_stream):
+                response = await agent.achat(query)
+        finally:
+            get_calender_agent_pool().release(agent)
+        # The agent may have written to the calendar
+        get_availability_service().invalidate("primary")
         return StopEvent(result=response)
 
 
-def get_details_from_promot(user_prompt: str):
-    system_prompt = """
-    As a personal assistant, analyze the given prompt and extract the following information:
-    - date: Convert any relative or absolute dates to YYYY-MM-DD format
-    - timezone: Extract any mentioned timezone example: IST, CST(leave empty if not specified)
-    - timeslot: Format time range as "HH:MM AM/PM - HH:MM AM/PM"
-    - intent: Determine if the action is create_meeting with xyz person, create_meeting on topic, cancel_meeting, or reschedule_meeting
-    
-    Return the information in the following JSON structure, maintaining the exact format:
-    {
-        "date": "YYYY-MM-DD",
-        "timezone": "IST",
-        "timeslot": "HH:MM AM/PM - HH:MM AM/PM",
-        "intent": "meeting with xyz person or meeting on specific topic etc"
-    }
-    Note: Always get the today's date"""+str(datetime.today())+"""and formulate the target dates based on this.
-    """
-
-    # Send the preprocessed prompt to the LLM
-    response = openai.chat.completions.create(
-        model="gpt-4o-2024-08-06",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-    )
-
-    # Extract the response
-    llm_response = json.loads(response.choices[0].message.content)
-    print(llm_response)
-    return llm_response
+details_cache = QueryCache(max_size=1024, ttl=3600.0)
+
+# Kept byte-identical across requests (the date and known fields go in the user message) so the
+# provider's prompt cache can serve it
+CALENDER_EXTRACTION_PROMPT = """
+As a personal assistant, analyze the given prompt and extract the requested fields:
+- date: Convert any relative or absolute dates to YYYY-MM-DD format, based on today's date
+- timezone: Extract any mentioned timezone example: IST, CST (null if not specified)
+- timeslot: Format time range as "HH:MM AM/PM - HH:MM AM/PM"
+- intent: Determine if the action is create_meeting with xyz person, create_meeting on topic, cancel_meeting, or reschedule_meeting
+Only the fields listed under "Fields to extract" are needed; set the others to null. The known fields are given for context.
+"""
+
+
+class CalendarDetails(BaseModel):
+    date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    timezone: Optional[str] = None
+    timeslot: Optional[str] = Field(None, pattern=r"^\d{1,2}:\d{2} [AP]M - \d{1,2}:\d{2} [AP]M$")
+    intent: Optional[str] = None
+
+
+# Relative dates ("tomorrow") resolve differently every day, so today's date is part of the key
+@cached(details_cache, extra_key=lambda: date.today().isoformat())
+async def get_details_from_promot(user_prompt: str):
+    # Most requests are fully resolved by the local parser; the LLM only fills what is left
+    details = parse_calendar_prompt(user_prompt)
+    missing = [field for field in FIELDS if details[field] is None]
+    if not missing:
+        print(details)
+        return details
+
+    resolved = {field: details[field] for field in FIELDS if details[field] is not None}
+    # Everything that changes per request is in the user message, after the static prefix
+    today = date.today()
+    extracted = await extract("calender_details", CalendarDetails, CALENDER_EXTRACTION_PROMPT, (
+        f"Today's date: {today.isoformat()} ({today.strftime('%A')})\n"
+        f"Known fields: {json.dumps(resolved)}\n"
+        f"Fields to extract: {', '.join(missing)}\n"
+        f"Prompt: {user_prompt}"
+    ))
+    for field in missing:
+        details[field] = getattr(extracted, field) or ""
+        details["sources"][field] = "llm"
+    print(details)
+    return details
+
+
+def build_calender_task(details: dict) -> str:
+    return f"""
+                Book meeting slots according to "{details['timeslot']} -> {details['intent']}".
+                Properly label them with the work provided to be don e in that time period.
+                Schedule it for today. Today's date is {details['date']} (it's in YYYY-MM-DD format)
+                and make the timezone be {details['timezone']}.
+                """
 
 
 async def main():
-    response = get_details_from_promot("book a slot for a meeting with keshav tomorrow from 3.00 PM to 4.00 PM on topic ai agents discussion")
-    task = f"""
-                Book meeting slots according to "{response['timeslot']} -> {response['intent']}".
-                Properly label them with the work provided to be don e in that time period.
-                Schedule it for today. Today's date is {response['date']} (it's in YYYY-MM-DD format)
-                and make the timezone be {response['timezone']}.
-                """
+    response = await get_details_from_promot("book a slot for a meeting with keshav tomorrow from 3.00 PM to 4.00 PM on topic ai agents discussion")
+    task = build_calender_task(response)
 
     print(task)
-    w = CalenderAgenticWorkflow(timeout=100, verbose=True)
-    result = await w.run(query=task)
+    w = CalenderAgenticWorkflow(timeout=WORKFLOW_TIMEOUT, verbose=True)
+    handler = w.run(query=task, details=response)
+    async for event in handler.stream_events():
+        message = format_progress(event)
+        if message:
+            print(message)
+    result = await handler
     print(result)
+    print(extraction_stats())
+    if tracing.is_enabled():
+        print(json.dumps(tracing.summary(), indent=2))
 
 if __name__ == "__main__":
     import asyncio
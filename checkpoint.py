@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.expanduser("~/.cache/cxo_agent/checkpoints.sqlite3"))
+# Unfinished runs older than this are not resumed, and are purged with everything they saved
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", "86400"))
+# A "running" run that has not saved anything for this long is taken to belong to a process that
+# died, and can be resumed
+CHECKPOINT_LEASE = float(os.getenv("CHECKPOINT_LEASE", "900"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    run_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_key ON runs (workflow, run_key, status, updated);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+"""
+
+
+def run_key(*parts: Any) -> str:
+    # Runs with the same inputs share a key; an unfinished run with the key is resumed
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+class CheckpointStore:
+    # SQLite log of workflow runs and what each completed step produced (by name). A run that
+    # fails or times out is released as "interrupted", and the next run with the same key picks
+    # up its checkpoints instead of redoing the finished steps. Claiming a run is a conditional
+    # UPDATE of its status, so two processes sharing the database never resume the same run;
+    # the run of a process that died is claimable once its lease expires.
+    def __init__(self, path: str = CHECKPOINT_DB, ttl: Optional[float] = CHECKPOINT_TTL,
+                 lease: float = CHECKPOINT_LEASE):
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        self.stats = {"runs": 0, "resumed": 0, "saved": 0, "restored": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _query(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _write(self, *statements: Tuple[str, Tuple]):
+        # One transaction for all statements
+        with self._lock, self._connection:
+            for sql, parameters in statements:
+                self._connection.execute(sql, parameters)
+
+    def _claim(self, run_id: str, now: float) -> bool:
+        # Only one claimant's UPDATE matches: it flips the status, so the others see rowcount 0
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "UPDATE runs SET status = 'running', updated = ? WHERE run_id = ? "
+                "AND (status = 'interrupted' OR (status = 'running' AND updated < ?))",
+                (now, run_id, now - self.lease)
+            ).rowcount == 1
+
+    def start_run(self, workflow: str, key: str, run_id: str, resume: bool = True) -> Tuple[str, bool]:
+        # Returns (run ID, resumed): the newest unfinished run with this key, or run_id as a new run
+        self.purge()
+        now = time.time()
+        if resume:
+            cutoff = now - self.ttl if self.ttl is not None else 0.0
+            rows = self._query(
+                "SELECT run_id FROM runs WHERE workflow = ? AND run_key = ? AND updated >= ? "
+                "AND (status = 'interrupted' OR (status = 'running' AND updated < ?)) ORDER BY updated DESC",
+                (workflow, key, cutoff, now - self.lease)
+            )
+            resumable = next((row[0] for row in rows if self._claim(row[0], now)), None)
+            if resumable is not None:
+                self.stats["resumed"] += 1
+                return resumable, True
+        self._write(("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, 'running', ?, ?)", (run_id, workflow, key, now, now)))
+        self.stats["runs"] += 1
+        return run_id, False
+
+    def release(self, *run_ids: str):
+        # Called when a run ends however it ends; an unfinished one becomes resumable again
+        self._write(*[("UPDATE runs SET status = 'interrupted' WHERE run_id = ? AND status = 'running'", (run_id,))
+                      for run_id in run_ids])
+
+    def save(self, run_id: str, name: str, value: Any):
+        self.save_many(run_id, {name: value})
+
+    def save_many(self, run_id: str, values: Dict[str, Any]):
+        self._write(*[("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (run_id, name, json.dumps(value)))
+                      for name, value in values.items()],
+                    ("UPDATE runs SET updated = ? WHERE run_id = ?", (time.time(), run_id)))
+        self.stats["saved"] += len(values)
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        rows = self._query("SELECT name, value FROM checkpoints WHERE run_id = ?", (run_id,))
+        self.stats["restored"] += len(rows)
+        return {name: json.loads(value) for name, value in rows}
+
+    def discard(self, run_id: str):
+        # Drops what the run saved (e.g. the sheet changed since), keeping the run itself
+        self._write(("DELETE FROM checkpoints WHERE run_id = ?", (run_id,)))
+
+    def finish(self, run_id: str, status: str = "done"):
+        # Finished runs are never resumed; their checkpoints are no longer needed
+        self._write(("UPDATE runs SET status = ?, updated = ? WHERE run_id = ?", (status, time.time(), run_id)),
+                    ("DELETE FROM checkpoints WHERE run_id = ?", (run_id,)))
+
+    def purge(self):
+        if self.ttl is None:
+            return
+        cutoff = time.time() - self.ttl
+        stale = "SELECT run_id FROM runs WHERE updated < ?"
+        self._write((f"DELETE FROM checkpoints WHERE run_id IN ({stale})", (cutoff,)),
+                    ("DELETE FROM runs WHERE updated < ?", (cutoff,)))
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CheckpointStore()
+    return _store
+
+
+def set_checkpoint_store(store: CheckpointStore):
+    # Lets tests and benchmarks keep checkpoints in a temporary database
+    global _store
+    _store = store
@@ -0,0 +1,221 @@
+from calender_agent_workflow import CalenderAgenticWorkflow, build_calender_task, get_details_from_promot
+from calender_agent_workflow import WORKFLOW_TIMEOUT as CALENDER_TIMEOUT
+from presentation_generator_agent_workflow import PresentationGenerationWorkflow, get_google_sheet_id_from_promot
+from presentation_generator_agent_workflow import WORKFLOW_TIMEOUT as PRESENTATION_TIMEOUT
+from resilience import deadline
+from semantic_workflow_router import get_route
+from worker_pool import WorkerPool, get_worker_pool, set_worker_pool, worker_count
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import itertools
+import re
+import time
+
+SLIDE_COUNT_PATTERN = re.compile(r"\b(\d{1,2})\s+slides?\b", re.IGNORECASE)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class NoRouteError(Exception):
+    pass
+
+
+async def run_calender_workflow(query: str, timeout: float) -> Any:
+    # The extraction call and the workflow run share the job's deadline
+    with deadline(timeout):
+        details = await get_details_from_promot(query)
+        w = CalenderAgenticWorkflow(timeout=timeout, verbose=False)
+        return await w.run(query=build_calender_task(details), details=details)
+
+
+async def run_presentation_workflow(query: str, timeout: float) -> Any:
+    with deadline(timeout):
+        response = await get_google_sheet_id_from_promot(query)
+        slides = SLIDE_COUNT_PATTERN.search(query)
+        w = PresentationGenerationWorkflow(timeout=timeout, verbose=False)
+        return await w.run(google_sheet_id=response["sheet_id"], number_of_slides=int(slides.group(1)) if slides else 10)
+
+
+@dataclass
+class WorkflowConfig:
+    run: Callable[[str, float], Awaitable[Any]]
+    concurrency: int
+    timeout: float
+    max_queue_size: int = 100
+
+
+DEFAULT_WORKFLOWS = {
+    "calender_workflow": WorkflowConfig(run=run_calender_workflow, concurrency=8, timeout=CALENDER_TIMEOUT),
+    "presentation_workflow": WorkflowConfig(run=run_presentation_workflow, concurrency=2, timeout=PRESENTATION_TIMEOUT),
+}
+
+
+@dataclass(order=True)
+class Job:
+    priority: int
+    sequence: int
+    query: str = field(compare=False)
+    route: str = field(compare=False)
+    timeout: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    submitted_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class _Latencies:
+    def __init__(self, size: int = 1000):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {"count": len(ordered), "p50": percentile(0.50), "p95": percentile(0.95), "max": ordered[-1]}
+
+
+class WorkflowDispatcher:
+    # Routes each request with the semantic router and runs it on that workflow's priority queue.
+    # Every workflow has a bounded queue (backpressure) and a fixed number of worker tasks, which
+    # is its concurrency limit; lower priority numbers run first, equal priorities in FIFO order.
+    # With workers > 0 (default: WORKER_PROCESSES) routing embeddings and deck rendering run in a
+    # pool of that many processes, started with the dispatcher.
+    def __init__(self, workflows: Optional[Dict[str, WorkflowConfig]] = None, workers: Optional[int] = None):
+        self.workflows = workflows or DEFAULT_WORKFLOWS
+        self.workers = worker_count() if workers is None else workers
+        self.worker_pool: Optional[WorkerPool] = None
+        self._owns_pool = False
+        self._queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self._counters = {name: {"submitted": 0, "completed": 0, "failed": 0, "timed_out": 0, "rejected": 0, "running": 0}
+                          for name in self.workflows}
+        self._wait_times = {name: _Latencies() for name in self.workflows}
+        self._run_times = {name: _Latencies() for name in self.workflows}
+
+    async def start(self):
+        if self.workers > 0:
+            self.worker_pool = get_worker_pool()
+            if self.worker_pool is None or self.worker_pool.processes != self.workers:
+                self.worker_pool = WorkerPool(self.workers)
+                set_worker_pool(self.worker_pool)
+                self._owns_pool = True
+            # Spawning the workers and loading their models takes a while; keep the loop free meanwhile
+            await asyncio.to_thread(self.worker_pool.start)
+        for name, config in self.workflows.items():
+            self._queues[name] = asyncio.PriorityQueue(maxsize=config.max_queue_size)
+            self._workers.extend(
+                asyncio.create_task(self._worker(name), name=f"{name}-worker-{index}")
+                for index in range(config.concurrency)
+            )
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        if self._owns_pool:
+            await asyncio.to_thread(self.worker_pool.stop)
+            set_worker_pool(None)
+            self._owns_pool = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def submit(self, query: str, priority: int = 0, timeout: Optional[float] = None,
+                     block: bool = True) -> asyncio.Future:
+        # Routing is CPU-bound (one embedding), so it runs off the event loop
+        route = await asyncio.to_thread(get_route, query)
+        if route not in self.workflows:
+            raise NoRouteError(f"No workflow matches the request: {query!r}")
+
+        job = Job(
+            priority=priority,
+            sequence=next(self._sequence),
+            query=query,
+            route=route,
+            timeout=timeout or self.workflows[route].timeout,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue = self._queues[route]
+        if block:
+            await queue.put(job)
+        else:
+            try:
+                queue.put_nowait(job)
+            except asyncio.QueueFull:
+                self._counters[route]["rejected"] += 1
+                raise QueueFullError(f"{route} queue is full ({queue.maxsize} jobs)")
+        self._counters[route]["submitted"] += 1
+        return job.future
+
+    async def dispatch(self, query: str, priority: int = 0, timeout: Optional[float] = None) -> Any:
+        return await (await self.submit(query, priority=priority, timeout=timeout))
+
+    async def _worker(self, name: str):
+        queue, config, counters = self._queues[name], self.workflows[name], self._counters[name]
+        while True:
+            job = await queue.get()
+            started = time.monotonic()
+            self._wait_times[name].add(started - job.submitted_at)
+            counters["running"] += 1
+            try:
+                result = await asyncio.wait_for(config.run(job.query, job.timeout), timeout=job.timeout)
+                counters["completed"] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except asyncio.TimeoutError as e:
+                counters["timed_out"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            except Exception as e:
+                counters["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                counters["running"] -= 1
+                self._run_times[name].add(time.monotonic() - started)
+                queue.task_done()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: dict(
+                self._counters[name],
+                queue_depth=self._queues[name].qsize() if name in self._queues else 0,
+                queue_wait=self._wait_times[name].summary(),
+                run_time=self._run_times[name].summary(),
+            )
+            for name in self.workflows
+        }
+
+
+async def main(queries: List[str]):
+    async with WorkflowDispatcher() as dispatcher:
+        results = await asyncio.gather(*(dispatcher.dispatch(query) for query in queries), return_exceptions=True)
+        for query, result in zip(queries, results):
+            print(f"{query}\n  -> {result}")
+        print(dispatcher.metrics())
+        if dispatcher.worker_pool is not None:
+            print(dispatcher.worker_pool.stats)
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(main(sys.argv[1:]))
@@ -1,5 +1,7 @@
 from llama_index.core.workflow import Event
-from typing import List, Any
+from pydantic import Field
+from typing import List, Any, Dict, Optional
+import time
 
 
 class PrefixMessageEvent(Event):
@@ -8,3 +10,52 @@ class PrefixMessageEvent(Event):
 
 class AgentEvent(Event):
     agent: Any
+
+
+class SheetLoadEvent(Event):
+    google_sheet_id: Optional[str] = None
+    sheet_path: Optional[str] = None
+
+
+class SheetProfileEvent(Event):
+    profile: Dict[str, Any]
+
+
+class SlideTaskEvent(Event):
+    index: int
+
+
+class SlideReadyEvent(Event):
+    index: int
+    # As written by the LLM (kept for the artifact cache) and with chart/table data resolved
+    spec: Dict[str, Any]
+    slide: Dict[str, Any]
+
+
+# Progress events are written to the workflow's event stream while a run is in flight; the
+# timestamp lets consumers measure time-to-first-feedback and per-step durations.
+class ProgressEvent(Event):
+    timestamp: float = Field(default_factory=time.time)
+
+
+class StatusEvent(ProgressEvent):
+    message: str
+
+
+class ToolCallStartEvent(ProgressEvent):
+    tool_name: str
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ToolCallEndEvent(ProgressEvent):
+    tool_name: str
+    duration: float
+    error: Optional[str] = None
+
+
+class LLMTokenEvent(ProgressEvent):
+    delta: str
+
+
+class ArtifactReadyEvent(ProgressEvent):
+    path: str
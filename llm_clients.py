@@ -0,0 +1,73 @@
+from resilience import get_upstream, retry_on
+from tracing import record_attempt, record_usage, span
+from typing import Any, Optional
+import httpx
+import openai
+import os
+import threading
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# Connections kept to the provider across every workflow in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+_async_openai_client: Optional[openai.AsyncOpenAI] = None
+_async_openai_client_lock = threading.Lock()
+
+
+async def _on_request(request):
+    record_attempt()
+
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    # One client per process so every extraction reuses the same pooled HTTP connections.
+    # OPENAI_BASE_URL / OPENAI_API_KEY are read on first use, which lets benchmarks point it at a mock server.
+    global _async_openai_client
+    if _async_openai_client is None:
+        with _async_openai_client_lock:
+            if _async_openai_client is None:
+                # Retries are done by the resilience layer (with hedging and the circuit breaker),
+                # so the client's own retries are off. The request hook sees every HTTP attempt.
+                _async_openai_client = openai.AsyncOpenAI(
+                    max_retries=0,
+                    timeout=LLM_TIMEOUT,
+                    http_client=openai.DefaultAsyncHttpxClient(
+                        event_hooks={"request": [_on_request]},
+                        limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                            max_keepalive_connections=LLM_MAX_CONNECTIONS),
+                    ),
+                )
+    return _async_openai_client
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+_retryable_error = retry_on(openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError,
+                            openai.InternalServerError)
+
+
+def _retryable(error: BaseException) -> bool:
+    if _retryable_error(error):
+        error.retry_after = _retry_after(error)
+        return True
+    return False
+
+
+async def create_chat_completion(**kwargs) -> Any:
+    # chat.completions.create with retries, hedging and the "openai" circuit breaker, bounded by
+    # the caller's deadline; the tracing span carries the model, token usage and attempts
+    client = get_async_openai_client()
+    upstream = get_upstream("openai", max_attempts=LLM_MAX_RETRIES)
+    with span("llm.chat", "llm", model=kwargs.get("model")) as current:
+        response = await upstream.call(
+            lambda timeout: client.chat.completions.create(**kwargs, timeout=timeout),
+            _retryable, timeout=LLM_TIMEOUT, hedge=True,
+        )
+        record_usage(current, response.usage)
+        return response
@@ -0,0 +1,127 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Union
+import json
+import random
+import threading
+import time
+
+# Covers every JSON field the extraction prompts ask for, so one reply works for both
+DEFAULT_CONTENT = json.dumps({
+    "sheet_id": "1JJZdYpyEFsF-IXUa5Ek30wlNdAueICMf26BLUQLnbuU",
+    "date": "2024-01-01",
+    "timezone": "IST",
+    "timeslot": "03:00 PM - 04:00 PM",
+    "intent": "create_meeting on topic mock",
+})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 makes bursts of concurrent clients wait on SYN retries
+    request_queue_size = 1024
+
+
+class MockLLMServer:
+    # Minimal OpenAI-compatible /v1/chat/completions endpoint with a fixed per-request latency.
+    # Requests are served on separate threads, so concurrent clients overlap their waits.
+    # respond(request) returns the reply content, or a full assistant message dict (e.g. with
+    # tool_calls); failure_rate of the requests fail with failure_status after the latency, and
+    # slow_rate of them take slow_latency instead, to reproduce a long latency tail.
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                 respond: Optional[Callable[[Dict], Union[str, Dict]]] = None,
+                 failure_rate: float = 0.0, failure_status: int = 500, seed: Optional[int] = None,
+                 slow_rate: float = 0.0, slow_latency: float = 5.0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.respond = respond or (lambda request: DEFAULT_CONTENT)
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.requests = 0
+        self.failures = 0
+        self.slow = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    slow = server._random.random() < server.slow_rate
+                    failed = server._random.random() < server.failure_rate
+                    server.slow += slow
+                    server.failures += failed
+                # The client may give up on a slow request (timeout, hedge won) and close the socket
+                time.sleep(server.slow_latency if slow else server.latency)
+                if failed:
+                    self._send(server.failure_status, {
+                        "error": {"message": "Injected failure", "type": "server_error", "code": None}
+                    })
+                    return
+
+                message = server.respond(request)
+                if isinstance(message, str):
+                    message = {"role": "assistant", "content": message}
+                self._send(200, {
+                    "id": f"chatcmpl-mock-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+
+            def _send(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import sys
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    with MockLLMServer(port=port) as mock:
+        print(f"Mock OpenAI server listening on {mock.base_url}")
+        threading.Event().wait()
@@ -0,0 +1,253 @@
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.util import Inches, Pt
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+import math
+import os
+
+CHART_TYPES = {
+    "bar": XL_CHART_TYPE.BAR_CLUSTERED,
+    "column": XL_CHART_TYPE.COLUMN_CLUSTERED,
+    "stacked_column": XL_CHART_TYPE.COLUMN_STACKED,
+    "line": XL_CHART_TYPE.LINE_MARKERS,
+    "area": XL_CHART_TYPE.AREA,
+    "pie": XL_CHART_TYPE.PIE,
+    "doughnut": XL_CHART_TYPE.DOUGHNUT,
+}
+AGGREGATIONS = ("sum", "mean", "median", "min", "max", "count")
+MAX_TABLE_ROWS = 12
+
+# Slide geometry for the default 10in x 7.5in template
+CONTENT_TOP = Inches(1.6)
+CONTENT_HEIGHT = Inches(5.4)
+LEFT_MARGIN = Inches(0.5)
+FULL_WIDTH = Inches(9.0)
+HALF_WIDTH = Inches(4.3)
+RIGHT_COLUMN = Inches(5.0)
+
+SLIDE_FORMAT = """
+{
+  "title": "Slide title",
+  "bullets": ["Insight backed by a number from the profile", "..."],
+  "chart": {
+    "type": "bar | column | stacked_column | line | area | pie | doughnut",
+    "title": "Chart title",
+    "data": {"by": "<category column>", "values": ["<number column>"], "agg": "sum | mean | median | min | max | count", "top": 5}
+  },
+  "table": {"data": {"by": "<category column>", "values": ["<number column>", "..."], "agg": "sum", "top": 8}},
+  "notes": "Speaker notes"
+}
+Chart/table "data" may instead be a time series {"date": "<date column>", "values": ["<number column>"], "frequency": "D | W | MS | QS | YS", "agg": "sum"}
+or literal values {"categories": ["..."], "series": [{"name": "...", "values": [1, 2]}]} (tables: {"columns": [...], "rows": [[...]]}).
+"chart", "table" and "notes" are optional; a slide shows at most one visual, either a chart or a table.
+"""
+
+# A deck spec is {"title": ..., "subtitle": ..., "slides": [<SLIDE_FORMAT>, ...]}
+
+
+class SlideSpecError(ValueError):
+    pass
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def normalize_slide(slide_spec: Any) -> Dict[str, Any]:
+    # Coerces a slide as the LLM wrote it into the shape the renderer expects: text fields are
+    # strings, bullets a list of strings, and a chart/table that is not an object is dropped
+    if not isinstance(slide_spec, dict):
+        slide_spec = {"title": _text(slide_spec)}
+    slide = dict(slide_spec)
+    slide["title"] = _text(slide.get("title"))
+    bullets = slide.get("bullets") or []
+    slide["bullets"] = [_text(bullet) for bullet in (bullets if isinstance(bullets, list) else [bullets])]
+    for visual in ("chart", "table"):
+        spec = slide.get(visual)
+        if spec is None or (isinstance(spec, dict) and isinstance(spec.get("data", {}), dict)):
+            continue
+        if spec:
+            print(f"Skipping {visual} on slide {slide['title']!r}: expected an object with object data, got {spec!r}")
+        slide.pop(visual)
+    if slide.get("notes") is not None:
+        slide["notes"] = _text(slide["notes"])
+    return slide
+
+
+def _values(data: Dict[str, Any]) -> List[str]:
+    values = data.get("values") or ([data["value"]] if data.get("value") else [])
+    return [str(value) for value in values]
+
+
+def _aggregate(grouped, agg: str):
+    if agg not in AGGREGATIONS:
+        raise SlideSpecError(f"Unknown aggregation {agg!r}")
+    return getattr(grouped, agg)()
+
+
+def resolve_data(data: Dict[str, Any], frame: Optional[pd.DataFrame]) -> Tuple[List[str], List[Tuple[str, List[float]]]]:
+    # Turns a chart/table data reference into (categories, [(series name, values)]) by
+    # aggregating the sheet locally; literal categories/series are passed through.
+    if "categories" in data:
+        series = [(str(item.get("name", "")), [float(value) for value in item["values"]]) for item in data["series"]]
+        return [str(category) for category in data["categories"]], series
+
+    if frame is None:
+        raise SlideSpecError("Data references need the sheet frame")
+    agg = data.get("agg", "sum")
+    values = _values(data)
+    if not values and agg != "count":
+        raise SlideSpecError(f"Aggregation {agg!r} needs at least one value column")
+    missing = [column for column in [data.get("by"), data.get("date"), *values] if column and column not in frame.columns]
+    if missing:
+        raise SlideSpecError(f"Unknown columns {missing}")
+
+    if data.get("date"):
+        indexed = frame.dropna(subset=[data["date"]]).set_index(data["date"]).sort_index()
+        frequency = data.get("frequency", "MS")
+        if agg == "count" and not values:
+            table = indexed.iloc[:, :1].resample(frequency).count()
+            table.columns = ["count"]
+        else:
+            table = _aggregate(indexed[values].resample(frequency), agg)
+        categories = [timestamp.date().isoformat() for timestamp in table.index]
+    elif data.get("by"):
+        if agg == "count" and not values:
+            table = frame[data["by"]].value_counts().to_frame("count")
+        else:
+            table = _aggregate(frame.groupby(data["by"], dropna=True)[values], agg)
+            table = table.sort_values(values[0], ascending=False)
+        table = table.head(int(data.get("top", 10)))
+        categories = [str(category) for category in table.index]
+    else:
+        raise SlideSpecError("Data reference needs 'by', 'date' or 'categories'")
+
+    series = [
+        (str(column), [0.0 if pd.isna(value) else float(value) for value in table[column]])
+        for column in table.columns
+    ]
+    return categories, series
+
+
+def _format_cell(value: Any) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        return f"{value:,.0f}" if abs(value) >= 100 else f"{value:,.2f}"
+    return str(value)
+
+
+def _add_bullets(slide, bullets: List[str], left, width):
+    text_frame = slide.shapes.add_textbox(left, CONTENT_TOP, width, CONTENT_HEIGHT).text_frame
+    text_frame.word_wrap = True
+    for index, bullet in enumerate(bullets):
+        paragraph = text_frame.paragraphs[0] if index == 0 else text_frame.add_paragraph()
+        paragraph.text = f"• {bullet}"
+        paragraph.font.size = Pt(18 if len(bullets) <= 5 else 14)
+        paragraph.space_after = Pt(8)
+
+
+def _add_chart(slide, chart_spec: Dict[str, Any], frame, left, width):
+    chart_type = CHART_TYPES.get(chart_spec.get("type", "column"), XL_CHART_TYPE.COLUMN_CLUSTERED)
+    categories, series = resolve_data(chart_spec.get("data", {}), frame)
+    if chart_type in (XL_CHART_TYPE.PIE, XL_CHART_TYPE.DOUGHNUT):
+        # Pie charts can only show a single series
+        series = series[:1]
+
+    chart_data = CategoryChartData()
+    chart_data.categories = categories
+    for name, values in series:
+        chart_data.add_series(name, values)
+
+    chart = slide.shapes.add_chart(chart_type, left, CONTENT_TOP, width, CONTENT_HEIGHT, chart_data).chart
+    chart.has_legend = len(series) > 1 or chart_type in (XL_CHART_TYPE.PIE, XL_CHART_TYPE.DOUGHNUT)
+    if chart.has_legend:
+        chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+        chart.legend.include_in_layout = False
+    if chart_spec.get("title"):
+        chart.has_title = True
+        chart.chart_title.text_frame.text = chart_spec["title"]
+
+
+def _table_rows(data: Dict[str, Any], frame) -> Tuple[List[str], List[List[Any]]]:
+    if "columns" in data:
+        return [str(column) for column in data["columns"]], data["rows"][:MAX_TABLE_ROWS]
+    categories, series = resolve_data(data, frame)
+    columns = [str(data.get("by") or data.get("date") or "")] + [name for name, _ in series]
+    rows = [[category] + [values[index] for _, values in series] for index, category in enumerate(categories)]
+    return columns, rows[:MAX_TABLE_ROWS]
+
+
+def _add_table(slide, table_spec: Dict[str, Any], frame, left, width):
+    columns, rows = _table_rows(table_spec.get("data", table_spec), frame)
+
+    height = min(CONTENT_HEIGHT, Inches(0.4) * (len(rows) + 1))
+    table = slide.shapes.add_table(len(rows) + 1, len(columns), left, CONTENT_TOP, width, height).table
+    for column_index, column in enumerate(columns):
+        table.cell(0, column_index).text = column
+    for row_index, row in enumerate(rows, start=1):
+        for column_index, value in enumerate(row[:len(columns)]):
+            cell = table.cell(row_index, column_index)
+            cell.text = _format_cell(value)
+            cell.text_frame.paragraphs[0].font.size = Pt(12)
+
+
+def resolve_slide(slide_spec: Dict[str, Any], frame: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    # Replaces the chart/table data references of one slide with literal values computed from the
+    # frame, so slides can be resolved independently and the deck rendered without the frame.
+    # A visual whose data reference does not resolve is dropped; the rest of the slide is kept.
+    slide_spec = normalize_slide(slide_spec)
+    resolved = dict(slide_spec)
+    try:
+        if slide_spec.get("chart"):
+            categories, series = resolve_data(slide_spec["chart"].get("data", {}), frame)
+            resolved["chart"] = dict(slide_spec["chart"], data={
+                "categories": categories,
+                "series": [{"name": name, "values": values} for name, values in series],
+            })
+        elif slide_spec.get("table"):
+            columns, rows = _table_rows(slide_spec["table"].get("data", slide_spec["table"]), frame)
+            resolved["table"] = {"data": {"columns": columns, "rows": rows}}
+    except (SlideSpecError, KeyError, TypeError, ValueError) as e:
+        visual = "chart" if slide_spec.get("chart") else "table"
+        print(f"Skipping {visual} on slide {slide_spec.get('title')!r}: {e}")
+        resolved.pop(visual, None)
+    return resolved
+
+
+def render_presentation(spec: Dict[str, Any], frame: Optional[pd.DataFrame], output_path: str) -> str:
+    # Renders a deck spec with native, editable pptx charts and tables. frame may be None when
+    # every slide has already been through resolve_slide.
+    # A chart or table whose data reference does not resolve is left out; the slide is kept.
+    presentation = Presentation()
+
+    title_slide = presentation.slides.add_slide(presentation.slide_layouts[0])
+    title_slide.shapes.title.text = _text(spec.get("title")) or "Presentation"
+    title_slide.placeholders[1].text = _text(spec.get("subtitle"))
+
+    for slide_spec in map(normalize_slide, spec.get("slides") or []):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = slide_spec["title"]
+
+        bullets = slide_spec["bullets"]
+        visual = "chart" if slide_spec.get("chart") else "table" if slide_spec.get("table") else None
+        visual_left, visual_width = (RIGHT_COLUMN, HALF_WIDTH) if bullets else (LEFT_MARGIN, FULL_WIDTH)
+        if bullets:
+            _add_bullets(slide, bullets, LEFT_MARGIN, HALF_WIDTH if visual else FULL_WIDTH)
+
+        try:
+            if visual == "chart":
+                _add_chart(slide, slide_spec["chart"], frame, visual_left, visual_width)
+            elif visual == "table":
+                _add_table(slide, slide_spec["table"], frame, visual_left, visual_width)
+        except (SlideSpecError, KeyError, TypeError, ValueError) as e:
+            print(f"Skipping {visual} on slide {slide_spec.get('title')!r}: {e}")
+
+        if slide_spec.get("notes"):
+            slide.notes_slide.notes_text_frame.text = slide_spec["notes"]
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    presentation.save(output_path)
+    return output_path
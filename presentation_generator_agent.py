@@ -1,83 +1,56 @@
 import streamlit as st
-from composio_llamaindex import ComposioToolSet, App, Action
-from llama_index.core.agent import FunctionCallingAgentWorker
-from llama_index.core.llms import ChatMessage
-from llama_index.core import Settings
-from llama_index.llms.openai import OpenAI
 from dotenv import load_dotenv
-import shutil
+from artifact_store import get_artifact_store
+from app_startup import Warmup, current_warmup, report_render
+from typing import Callable, Optional
+import asyncio
 import os
-import glob
+import time
 
 
 class PowerPointGenerator:
-    def __init__(self, google_sheet_id, model: str = 'gpt-4o'):
-        self.google_sheet_id = google_sheet_id
-        self.llm = OpenAI(model=model, timeout=300.0)
-        Settings.llm = self.llm
-        self.composio_toolset = ComposioToolSet()
-        self.tools = self.composio_toolset.get_tools(actions=[
-            Action.CODEINTERPRETER_EXECUTE_CODE,
-            Action.CODEINTERPRETER_GET_FILE_CMD,
-            Action.CODEINTERPRETER_RUN_TERMINAL_CMD,
-            Action.GOOGLESHEETS_BATCH_GET
-        ])
-        self.agent = self.create_agent()
-
-    def create_agent(self):
-        prefix_messages = [
-            ChatMessage(
-                role="system",
-                content=(
-                    f"""
-                    You are an AI assistant specialized in creating PowerPoint presentations using the python-pptx library. 
-                    Your task is to analyze the Google Sheets data from the provided spreadsheet ID: {self.google_sheet_id}. 
-                    Extract key insights and generate relevant charts based on this data. 
-                    Finally, create a well-structured presentation that includes these charts and any necessary images, ensuring 
-                    that the formatting is professional and visually appealing. Always create 10 slides with more 
-                    in-depth information covering all aspects of the sheet. When utilizing the Google Sheets tool, only the 
-                    spreadsheet ID should be passed as input parameters.
-                    NOTE: Mostly the user passes small sheets, so try to read the whole sheet at once and not via ranges.
-                    """
-                )
-            )
-        ]
-
-        return FunctionCallingAgentWorker(
-            tools=self.tools,
-            llm=self.llm,
-            prefix_messages=prefix_messages,
-            max_function_calls=15,
-            allow_parallel_tool_calls=False,
-            verbose=True
-        ).as_agent()
-
-    @staticmethod
-    def copy_pptx_to_current_directory():
-        source_dir = '/Users/pavanmantha/.composio/output/'
-        destination_dir = os.getcwd()
-        pptx_files = glob.glob(os.path.join(source_dir, '*.pptx'))
-
-        for file_path in pptx_files:
-            filename = os.path.basename(file_path)
-            destination_path = os.path.join(destination_dir, filename)
-            shutil.move(file_path, destination_path)
-            return destination_path  # Return the path of the moved file
-
-        print("All PowerPoint files have been moved.")
-        return None
-
-    def generate_presentation(self, number_of_slides: int = 10):
-        task = f"""
-        Create a PowerPoint presentation from the Google Sheet: {self.google_sheet_id}. 
-        Create a sandbox First retrieve the sheets content, pip install python-pptx using the code interpreter, 
-        and then use python-pptx. Then write code to create graphs from the data.
-        Ensure the presentation is detailed, visually appealing, and contains {number_of_slides} slides. 
-        Include charts and tables for key insights and ensure proper formatting.
-        """
-
-        self.agent.chat(task)
-        return self.copy_pptx_to_current_directory()
+    def __init__(self, model: str = 'gpt-4o'):
+        self.model = model
+
+    async def _run_workflow(self, google_sheet_id: str, number_of_slides: int, on_event: Optional[Callable] = None):
+        from events import ArtifactReadyEvent
+        from presentation_generator_agent_workflow import WORKFLOW_TIMEOUT, PresentationGenerationWorkflow
+
+        w = PresentationGenerationWorkflow(timeout=WORKFLOW_TIMEOUT, verbose=False)
+        handler = w.run(google_sheet_id=google_sheet_id, number_of_slides=number_of_slides, model=self.model)
+
+        presentation_path = None
+        async for event in handler.stream_events():
+            if isinstance(event, ArtifactReadyEvent):
+                presentation_path = event.path
+            if on_event is not None:
+                on_event(event)
+        await handler
+        return presentation_path
+
+    def generate_presentation(self, google_sheet_id: str, number_of_slides: int = 10, on_event: Optional[Callable] = None):
+        # on_event receives every progress event (tool calls, LLM output, artifacts) as it happens
+        return asyncio.run(self._run_workflow(google_sheet_id, number_of_slides, on_event))
+
+
+@st.cache_resource(show_spinner=False)
+def presentation_warmup() -> Warmup:
+    # The workflow module pulls in llama-index, composio, pandas and python-pptx; import it and
+    # create the shared clients once per process, in the background, not on every rerun
+    def load():
+        from llm_clients import get_async_openai_client
+        from tool_registry import get_tool_registry
+        import presentation_generator_agent_workflow
+
+        get_async_openai_client()
+        return get_tool_registry().toolset
+
+    return Warmup("presentation", load)
+
+
+@st.cache_resource(show_spinner=False)
+def get_power_point_generator(model: str) -> PowerPointGenerator:
+    return PowerPointGenerator(model=model)
 
 
 def main():
@@ -86,6 +59,7 @@ def main():
         page_icon="📊",
         layout="wide"
     )
+    warmup = current_warmup(presentation_warmup)
 
     # Sidebar with How to Use instructions
     with st.sidebar:
@@ -106,7 +80,7 @@ def main():
         
         3. **Generate & Download**
            - Click "Generate Presentation"
-           - Wait for processing (typically 2-5 minutes)
+           - Follow the agent's progress (typically 2-5 minutes)
            - Download the generated PPTX file
         
         ### Important Notes
@@ -163,27 +137,48 @@ def main():
             st.error("Please enter a Google Sheet ID")
             return
 
+        from events import LLMTokenEvent
+        from progress import format_progress
+
         try:
-            with st.spinner("Generating your presentation... This may take a few minutes."):
-                # Create generator instance
-                ppt_generator = PowerPointGenerator(google_sheet_id, model=model)
+            with st.status("Generating your presentation... This may take a few minutes.", expanded=True) as status:
+                # Agent output is shown as it arrives, tool calls as one line each
+                agent_output = st.empty()
+                agent_text = []
+
+                def render(event):
+                    if isinstance(event, LLMTokenEvent):
+                        agent_text.append(event.delta)
+                        agent_output.markdown("".join(agent_text)[-2000:])
+                        return
+                    message = format_progress(event)
+                    if message:
+                        status.write(message)
+
+                if not warmup.ready:
+                    status.write("Loading the presentation workflow...")
+                warmup.result()
+                ppt_generator = get_power_point_generator(model)
 
                 # Generate presentation and get the file path
-                presentation_path = ppt_generator.generate_presentation(number_of_slides=no_of_sheets)
+                presentation_path = ppt_generator.generate_presentation(
+                    google_sheet_id,
+                    number_of_slides=int(no_of_sheets) if no_of_sheets else 10,
+                    on_event=render
+                )
+                status.update(label="Presentation generated", state="complete", expanded=False)
 
                 if presentation_path and os.path.exists(presentation_path):
-                    # Read the file for download
-                    with open(presentation_path, "rb") as file:
-                        presentation_data = file.read()
-
                     # Success message and download button in columns
                     col1, col2 = st.columns([1, 2])
                     with col1:
                         st.success("Generation complete!")
                     with col2:
+                        # Streamlit keeps download data in memory either way, so the deck's bytes
+                        # are passed explicitly
                         st.download_button(
                             label="Download Presentation",
-                            data=presentation_data,
+                            data=get_artifact_store().read(presentation_path),
                             file_name="generated_presentation.pptx",
                             mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
                             use_container_width=True
@@ -197,4 +192,7 @@ def main():
 
 
 if __name__ == "__main__":
+    run_started = time.perf_counter()
     main()
+    timings = report_render("presentation_generator_agent", run_started)
+    st.caption(f"Cold start {timings['cold_start_ms']:.0f} ms · this run {timings['render_ms']:.0f} ms")
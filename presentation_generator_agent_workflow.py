@@ -4,136 +4,430 @@ from llama_index.core.workflow import (
     Workflow,
     step, Context
 )
-from composio_llamaindex import ComposioToolSet, Action
-from llama_index.core.agent import FunctionCallingAgentWorker
-from llama_index.core.llms import ChatMessage
-from llama_index.llms.openai import OpenAI
-from events import PrefixMessageEvent, AgentEvent
+from composio_llamaindex import Action
+from events import ArtifactReadyEvent, SheetLoadEvent, SheetProfileEvent, SlideReadyEvent, SlideTaskEvent, StatusEvent
+from progress import format_progress
+from query_cache import QueryCache, cached
+from tool_registry import execute_action
+from sheet_profile import find_sheet_values, format_profile, load_frame, profile_frame
+from pptx_renderer import SLIDE_FORMAT, render_presentation, resolve_slide
+from llm_clients import create_chat_completion
+from structured_output import extract, extraction_stats, repair_json
+from pydantic import BaseModel, Field
+from resilience import WorkflowDeadline
+from artifact_cache import column_hashes, get_artifact_cache
+from artifact_store import get_artifact_store
+from checkpoint import get_checkpoint_store, run_key
+from worker_pool import get_worker_pool
+from tracing import traced_step
+from typing import Dict, List, Optional, Union
+import asyncio
 import dotenv
 import json
-import openai
+import os
+import re
+import tracing
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
 
-class PresentationGenerationWorkflow(Workflow):
-    @step
-    async def initialize(self, ev: StartEvent, ctx: Context) -> PrefixMessageEvent:
-        number_of_slides = ev.number_of_slides | 10
-
-        # set the googlesheet id and llm to ctx
-        await ctx.set("llm", OpenAI(model="gpt-4o"))
-
-        composio_toolset = ComposioToolSet()
-
-        tools = composio_toolset.get_tools(actions=[
-            Action.CODEINTERPRETER_EXECUTE_CODE,
-            Action.CODEINTERPRETER_GET_FILE_CMD,
-            Action.CODEINTERPRETER_RUN_TERMINAL_CMD,
-            Action.GOOGLESHEETS_BATCH_GET
-        ])
-        await ctx.set("tools", tools)
-
-        prefix_messages = [
-            ChatMessage(
-                role="system",
-                content=(
-                    f"""
-                    You are an AI assistant specialized in creating PowerPoint presentations using the python-pptx library. 
-                    Your task is to analyze the Google Sheets data from the provided spreadsheet ID: {ev.google_sheet_id}. 
-                    Extract key insights and generate relevant charts based on this data. 
-                    Finally, create a well-structured presentation that includes these charts and any necessary images, ensuring 
-                    that the formatting is professional and visually appealing. Always create {number_of_slides} slides with more 
-                    in-depth information covering all aspects of the sheet. When utilizing the Google Sheets tool, only the 
-                    spreadsheet ID should be passed as input parameters.
-                    NOTE: Mostly the user passes small sheets, so try to read the whole sheet at once and not via ranges.
-                    """
-                )
-            )
-        ]
+# Bump when the slide spec prompts or formats change, so cached specs are not reused
+PROMPT_VERSION = "slide-spec-v2"
+# Per-slide LLM calls in flight at once for a single deck
+SLIDE_CONCURRENCY = int(os.getenv("SLIDE_CONCURRENCY", "4"))
+# Decks take minutes; also the deadline for every LLM and tool call a run makes
+WORKFLOW_TIMEOUT = 900.0
 
-        task = f"""
-        Create a PowerPoint presentation from the Google Sheet: {ev.google_sheet_id}. 
-        Create a sandbox First retrieve the sheets content, pip install python-pptx using the code interpreter, 
-        and then use python-pptx. Then write code to create graphs from the data.
-        Ensure the presentation is detailed, visually appealing, and contains {number_of_slides} slides. 
-        Include charts and tables for key insights and ensure proper formatting.
-        """
-
-        print(task)
-
-        await ctx.set("task", task)
-        return PrefixMessageEvent(prefix_messages=prefix_messages)
-
-    @step
-    async def create_agent(self, ev: PrefixMessageEvent, ctx: Context) -> AgentEvent:
-        tools = await ctx.get("tools")
-        llm = await ctx.get("llm")
-        prefix_messages = ev.prefix_messages
-
-        agent = FunctionCallingAgentWorker(
-            tools=tools,
-            llm=llm,
-            prefix_messages=prefix_messages,
-            max_function_calls=15,
-            allow_parallel_tool_calls=False,
-            verbose=True
-        ).as_agent()
-
-        return AgentEvent(agent=agent)
+OUTLINE_FORMAT = """
+{
+  "title": "Deck title",
+  "subtitle": "One line describing the data",
+  "slides": [
+    {"title": "Slide title", "focus": "What this slide should show and why", "columns": ["<sheet column>", "..."]}
+  ]
+}
+"""
 
-    @step
-    async def run_agent(self, ev: AgentEvent, ctx: Context) -> StopEvent:
-        agent = ev.agent
-        task = await ctx.get("task")
-        response = agent.chat(task)
-        return StopEvent(result=response)
-
-
-def get_google_sheet_id_from_promot(user_prompt: str):
-    system_prompt = """
-    As a personal assistant, analyze the given prompt and extract the Google Sheet ID. A Google Sheet ID is a unique 
-    string of characters that appears in the Google Sheet URL between /d/ and /edit.
-
-    Return the information in the following JSON structure, maintaining the exact format:
-    {
-        "sheet_id": "string"
-    }
+OUTLINE_SYSTEM_PROMPT = """
+    You are an AI assistant specialized in creating PowerPoint presentations from spreadsheet data. 
+    The sheet has already been read and summarized for you as a statistical profile: column types and statistics, 
+    top groups per category and time-series rollups. Extract key insights from it and outline a well-structured, 
+    professional presentation covering all aspects of the sheet, one distinct topic per slide. 
     
-    Note: A valid Google Sheet ID typically:
-    - Contains letters, numbers, and special characters like '-' and '_'
-    - Is approximately 44 characters long
-    - Does not contain spaces or common URL characters like '/' or '?'
+    Return only a JSON object in the following format:
+    """ + OUTLINE_FORMAT + """
+    Note: dont enclose in back tick like ```. just return plain JSON object.
+    """
+
+SLIDE_SYSTEM_PROMPT = """
+    You are an AI assistant specialized in creating PowerPoint presentations from spreadsheet data. 
+    You write the content of a single slide of an outlined deck, using the statistical profile of the sheet. 
+    Charts and tables reference sheet columns by their exact names and are computed from the full sheet when 
+    the deck is rendered, so prefer column references over copying numbers.
     
+    Return only a JSON object in the following format:
+    """ + SLIDE_FORMAT + """
     Note: dont enclose in back tick like ```. just return plain JSON object.
     """
 
-    # Send the preprocessed prompt to the LLM
-    response = openai.chat.completions.create(
-        model="gpt-4o-2024-08-06",
+
+def build_outline_prompt(sheet_name: str, number_of_slides: int, sheet_profile: str) -> str:
+    # The title slide is rendered from the deck title, so it counts towards the requested slides
+    return f"""
+        Create a PowerPoint presentation from the Google Sheet: {sheet_name}. 
+        Statistical profile of the sheet (JSON): {sheet_profile}
+        Outline exactly {max(int(number_of_slides) - 1, 1)} content slides. 
+        """
+
+
+def build_slide_prompt(outline: Dict, index: int, sheet_profile: str) -> str:
+    slide = outline["slides"][index]
+    titles = "\n".join(f"{number}. {item.get('title', '')}" for number, item in enumerate(outline["slides"], start=1))
+    return f"""
+        Deck: {outline.get('title', '')}
+        Outline:
+        {titles}
+        Write slide {index + 1}: {slide.get('title', '')}
+        Focus: {slide.get('focus', '')}
+        Statistical profile of the sheet (JSON): {sheet_profile}
+        Include a chart or a table for the key insight.
+        """
+
+
+def fetch_sheet_values(google_sheet_id: str):
+    # One direct tool call instead of letting an agent pull the raw values through its context.
+    # Never replayed from a checkpoint: a resumed run needs the current values to tell whether
+    # the sheet changed since it was interrupted.
+    response = execute_action(Action.GOOGLESHEETS_BATCH_GET, {"spreadsheet_id": google_sheet_id})
+    return find_sheet_values(response)
+
+
+def parse_json_object(content: str) -> Dict:
+    # Fences, trailing commas and cut-off replies are repaired rather than failing the slide
+    parsed = json.loads(repair_json(content))
+    if not isinstance(parsed, dict):
+        raise ValueError("Expected a JSON object")
+    return parsed
+
+
+async def complete_json(model: str, system_prompt: str, prompt: str) -> Dict:
+    response = await create_chat_completion(
+        model=model,
         messages=[
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
+            {"role": "user", "content": prompt}
         ]
     )
-    print(response.choices[0].message.content)
+    return parse_json_object(response.choices[0].message.content)
+
+
+class PresentationGenerationWorkflow(WorkflowDeadline, Workflow):
+    # The LLM outlines the deck once, then every slide is written by its own LLM call; up to
+    # SLIDE_CONCURRENCY slides run at once, so a deck takes about as long as its slowest slide.
+    # Charts and tables are computed from the sheet and rendered in-process with python-pptx.
+    # Decks are cached by sheet contents: an unchanged sheet returns the cached deck, and a
+    # changed one only rewrites the slides built on changed columns. The outline and every
+    # finished slide are checkpointed, so a run that dies or times out is resumed by the next run
+    # with the same inputs, unless the sheet's columns changed in between.
+    def run(self, *args, **kwargs):
+        # However the run ends (done, failed, timed out), the checkpoint run it claimed is released
+        claims: List[str] = []
+        handler = super().run(*args, checkpoint_claims=claims, **kwargs)
+        handler.add_done_callback(lambda _: get_checkpoint_store().release(*claims))
+        return handler
+
+    @step
+    @traced_step
+    async def initialize(self, ev: StartEvent, ctx: Context) -> SheetLoadEvent:
+        if not ev.get("google_sheet_id") and not ev.get("sheet_path"):
+            raise ValueError("Pass either google_sheet_id (a Google Sheet ID) or sheet_path (a CSV/XLSX file)")
+        # The sheet's identity for run keys and cache lineage; sheet_path wins, as in load_sheet
+        source = os.path.abspath(ev.get("sheet_path")) if ev.get("sheet_path") else ev.get("google_sheet_id")
+        await ctx.set("source", source)
+        ctx.write_event_to_stream(StatusEvent(message="Preparing the presentation"))
+        model, number_of_slides = ev.get("model") or "gpt-4o", ev.get("number_of_slides") or 10
+        await ctx.set("model", model)
+        await ctx.set("number_of_slides", number_of_slides)
+        await ctx.set("use_cache", ev.get("use_cache", True))
+        # Every run writes into its own directory of the artifact store
+        run_id = ev.get("run_id") or get_artifact_store().new_run()
+
+        checkpointing = ev.get("checkpoint", True)
+        if checkpointing:
+            run_id, resumed = await asyncio.to_thread(
+                get_checkpoint_store().start_run, "presentation", run_key(source, number_of_slides, model, PROMPT_VERSION),
+                run_id, ev.get("resume", True)
+            )
+            ev.get("checkpoint_claims", []).append(run_id)
+            if resumed:
+                ctx.write_event_to_stream(StatusEvent(message="Resuming an interrupted run"))
+        await ctx.set("run_id", run_id)
+        await ctx.set("checkpointing", checkpointing)
 
-    # Extract the response
-    llm_response = json.loads(response.choices[0].message.content)
-    print(llm_response)
-    return llm_response
+        # sheet_path (a CSV/XLSX file) replaces the Google Sheet fetch, e.g. for offline runs
+        return SheetLoadEvent(google_sheet_id=ev.get("google_sheet_id"), sheet_path=ev.get("sheet_path"))
+
+    @step
+    @traced_step
+    async def load_sheet(self, ev: SheetLoadEvent, ctx: Context) -> Union[SheetProfileEvent, StopEvent]:
+        ctx.write_event_to_stream(StatusEvent(message="Reading the sheet"))
+        if ev.sheet_path:
+            frame = await asyncio.to_thread(load_frame, path=ev.sheet_path)
+        else:
+            values = await asyncio.to_thread(fetch_sheet_values, ev.google_sheet_id)
+            frame = await asyncio.to_thread(load_frame, values=values)
+        await ctx.set("frame", frame)
+        await ctx.set("sheet_name", ev.google_sheet_id or os.path.splitext(os.path.basename(ev.sheet_path))[0])
+
+        hashes = None
+        if await ctx.get("use_cache") or await ctx.get("checkpointing"):
+            hashes = await asyncio.to_thread(column_hashes, frame)
+        await ctx.set("column_hashes", hashes)
+
+        if await ctx.get("use_cache"):
+            model, number_of_slides = await ctx.get("model"), await ctx.get("number_of_slides")
+            cache = get_artifact_cache()
+            key = cache.key(hashes, number_of_slides, model, PROMPT_VERSION)
+            lineage = cache.lineage(await ctx.get("source"), number_of_slides, model, PROMPT_VERSION)
+            cached_deck = await asyncio.to_thread(cache.get, key)
+            if cached_deck is not None:
+                ctx.write_event_to_stream(StatusEvent(message="Reusing the cached presentation"))
+                presentation_path = await asyncio.to_thread(
+                    get_artifact_store().save_file, await ctx.get("run_id"), await self._artifact_name(ctx),
+                    cached_deck.deck_path
+                )
+                await self._finish_run(ctx)
+                ctx.write_event_to_stream(ArtifactReadyEvent(path=presentation_path))
+                return StopEvent(result=presentation_path)
+            await ctx.set("cache_entry", {"key": key, "lineage": lineage, "column_hashes": hashes})
+
+        ctx.write_event_to_stream(StatusEvent(message="Profiling the sheet"))
+        profile = await asyncio.to_thread(profile_frame, frame)
+        return SheetProfileEvent(profile=profile)
+
+    @step
+    @traced_step
+    async def plan_outline(self, ev: SheetProfileEvent, ctx: Context) -> Union[SlideTaskEvent, StopEvent]:
+        sheet_profile = format_profile(ev.profile)
+        await ctx.set("sheet_profile", sheet_profile)
+
+        run_id = await self._checkpoint_run(ctx)
+        saved = await asyncio.to_thread(get_checkpoint_store().load, run_id) if run_id else {}
+        if saved and saved.get("column_hashes") != await ctx.get("column_hashes"):
+            # The sheet changed since the interrupted run; its outline and slides no longer apply
+            await asyncio.to_thread(get_checkpoint_store().discard, run_id)
+            saved = {}
+
+        previous, affected = None, None
+        cache_entry = await ctx.get("cache_entry", default=None)
+        if cache_entry is not None and "outline" not in saved:
+            cache = get_artifact_cache()
+            previous = await asyncio.to_thread(cache.get_previous, cache_entry["lineage"])
+            if previous is not None:
+                affected = cache.affected_slides(previous, cache_entry["column_hashes"])
+
+        if "outline" in saved:
+            outline = saved["outline"]
+            cached_slides = [value for name, value in saved.items() if name.startswith("slide:")]
+            ctx.write_event_to_stream(StatusEvent(
+                message=f"{len(cached_slides)} of {len(outline['slides'])} slides restored from the interrupted run"
+            ))
+        elif affected is not None:
+            # Same columns as the last deck from this sheet: keep its outline and unaffected slides
+            outline = previous.spec["outline"]
+            cached_slides = [
+                {"index": index, "spec": spec, "slide": slide}
+                for index, (spec, slide) in enumerate(zip(previous.spec["slides"], previous.spec["resolved"]))
+                if index not in affected
+            ]
+            get_artifact_cache().record_partial(reused=len(cached_slides), regenerated=len(affected))
+            ctx.write_event_to_stream(StatusEvent(
+                message=f"Sheet changed; rewriting {len(affected)} of {len(outline['slides'])} slides"
+            ))
+        else:
+            ctx.write_event_to_stream(StatusEvent(message="Outlining the slides"))
+            outline = await complete_json(
+                await ctx.get("model"),
+                OUTLINE_SYSTEM_PROMPT,
+                build_outline_prompt(await ctx.get("sheet_name"), await ctx.get("number_of_slides"), sheet_profile),
+            )
+            if not isinstance(outline.get("slides"), list) or not outline["slides"]:
+                raise ValueError("Outline must have a non-empty 'slides' list")
+            cached_slides = []
+            ctx.write_event_to_stream(StatusEvent(message=f"Writing {len(outline['slides'])} slides"))
+
+        if run_id and "outline" not in saved:
+            await asyncio.to_thread(get_checkpoint_store().save_many, run_id, {
+                "column_hashes": await ctx.get("column_hashes"),
+                "outline": outline,
+                **{f"slide:{cached['index']}": cached for cached in cached_slides},
+            })
+        await ctx.set("outline", outline)
+        await ctx.set("cached_slides", cached_slides)
+        cached_indices = {cached["index"] for cached in cached_slides}
+        pending = [index for index in range(len(outline["slides"])) if index not in cached_indices]
+        if not pending:
+            return StopEvent(result=await self._assemble(ctx, []))
+        for index in pending:
+            tracing.send_event(ctx, SlideTaskEvent(index=index))
+        return None
+
+    @step(num_workers=SLIDE_CONCURRENCY)
+    @traced_step
+    async def write_slide(self, ev: SlideTaskEvent, ctx: Context) -> SlideReadyEvent:
+        outline = await ctx.get("outline")
+        fallback = False
+        try:
+            spec = await complete_json(
+                await ctx.get("model"),
+                SLIDE_SYSTEM_PROMPT,
+                build_slide_prompt(outline, ev.index, await ctx.get("sheet_profile")),
+            )
+        except Exception as e:
+            # One failed slide should not cost the whole deck; fall back to the outline entry
+            print(f"Writing slide {ev.index + 1} failed: {e}")
+            planned = outline["slides"][ev.index]
+            spec = {"title": planned.get("title", ""), "bullets": [planned.get("focus", "")]}
+            fallback = True
+
+        # Chart/table data is aggregated off the event loop so other slides keep progressing
+        slide = await asyncio.to_thread(resolve_slide, spec, await ctx.get("frame"))
+        run_id = await self._checkpoint_run(ctx)
+        if run_id and not fallback:
+            # Fallback slides are not checkpointed, so a resumed run tries them again
+            await asyncio.to_thread(get_checkpoint_store().save, run_id, f"slide:{ev.index}",
+                                    {"index": ev.index, "spec": spec, "slide": slide})
+        ctx.write_event_to_stream(StatusEvent(message=f"Slide {ev.index + 1} ready: {slide.get('title', '')}"))
+        return SlideReadyEvent(index=ev.index, spec=spec, slide=slide)
+
+    @step
+    @traced_step
+    async def assemble_deck(self, ev: SlideReadyEvent, ctx: Context) -> StopEvent:
+        outline, cached_slides = await ctx.get("outline"), await ctx.get("cached_slides")
+        ready = ctx.collect_events(ev, [SlideReadyEvent] * (len(outline["slides"]) - len(cached_slides)))
+        if ready is None:
+            return None
+        return StopEvent(result=await self._assemble(ctx, ready))
+
+    async def _checkpoint_run(self, ctx: Context) -> Optional[str]:
+        return await ctx.get("run_id") if await ctx.get("checkpointing", default=False) else None
+
+    async def _finish_run(self, ctx: Context):
+        run_id = await self._checkpoint_run(ctx)
+        if run_id:
+            await asyncio.to_thread(get_checkpoint_store().finish, run_id)
+
+    async def _artifact_name(self, ctx: Context) -> str:
+        sheet_name = re.sub(r"[^A-Za-z0-9_-]", "_", await ctx.get("sheet_name"))[:24]
+        return f"presentation-{sheet_name}.pptx"
+
+    async def _assemble(self, ctx: Context, ready: List[SlideReadyEvent]) -> str:
+        ctx.write_event_to_stream(StatusEvent(message="Assembling the deck"))
+        outline = await ctx.get("outline")
+        cached_slides = [SlideReadyEvent(**cached) for cached in await ctx.get("cached_slides")]
+        ready = sorted(ready + cached_slides, key=lambda event: event.index)
+        spec = {
+            "title": outline.get("title", "Presentation"),
+            "subtitle": outline.get("subtitle", ""),
+            "slides": [event.slide for event in ready],
+        }
+        # In worker mode the deck is rendered by a pool process, straight into the store's temp file
+        pool = get_worker_pool()
+        if pool is not None:
+            writer = lambda path: pool.render(spec, path)
+        else:
+            writer = lambda path: render_presentation(spec, None, path)
+        presentation_path = await asyncio.to_thread(
+            get_artifact_store().write, await ctx.get("run_id"), await self._artifact_name(ctx), writer
+        )
+
+        cache_entry = await ctx.get("cache_entry", default=None)
+        if cache_entry is not None:
+            await asyncio.to_thread(get_artifact_cache().put, cache_entry["key"], cache_entry["lineage"],
+                                    presentation_path, {
+                                        "column_hashes": cache_entry["column_hashes"],
+                                        "outline": outline,
+                                        "slides": [event.spec for event in ready],
+                                        "resolved": [event.slide for event in ready],
+                                    })
+
+        await self._finish_run(ctx)
+        ctx.write_event_to_stream(ArtifactReadyEvent(path=presentation_path))
+        return presentation_path
+
+
+SHEET_URL_PATTERN = re.compile(
+    r"docs\.google\.com/spreadsheets/(?:u/\d+/)?d/(?P<sheet_id>[A-Za-z0-9_-]{20,})(?P<rest>[^\s]*)"
+)
+SHEET_GID_PATTERN = re.compile(r"[?#&]gid=(\d+)")
+# Bare IDs are ~44 URL-safe characters; requiring a digit and a letter avoids matching long words
+BARE_SHEET_ID_PATTERN = re.compile(r"(?<![A-Za-z0-9_/-])(?=[A-Za-z_-]*\d)(?=[0-9_-]*[A-Za-z])[A-Za-z0-9_-]{40,50}(?![A-Za-z0-9_-])")
+
+
+def extract_google_sheet_ids(text: str) -> List[Dict[str, Optional[str]]]:
+    found = []
+    for match in SHEET_URL_PATTERN.finditer(text):
+        gid = SHEET_GID_PATTERN.search(match.group("rest"))
+        found.append((match.start(), match.group("sheet_id"), gid.group(1) if gid else None))
+
+    # Blank out the URLs (keeping offsets) so their IDs are not matched again as bare IDs
+    remainder = SHEET_URL_PATTERN.sub(lambda match: " " * len(match.group(0)), text)
+    found.extend((match.start(), match.group(0), None) for match in BARE_SHEET_ID_PATTERN.finditer(remainder))
+
+    # One entry per sheet in prompt order, preferring an occurrence that names a gid
+    sheets = {}
+    for _, sheet_id, gid in sorted(found):
+        if sheet_id not in sheets or sheets[sheet_id]["gid"] is None:
+            sheets[sheet_id] = {"sheet_id": sheet_id, "gid": gid}
+    return list(sheets.values())
+
+
+SHEET_ID_EXTRACTION_PROMPT = """
+As a personal assistant, analyze the given prompt and extract the Google Sheet ID. A Google Sheet ID is a unique
+string of characters that appears in the Google Sheet URL between /d/ and /edit.
+A valid Google Sheet ID typically:
+- Contains letters, numbers, and special characters like '-' and '_'
+- Is approximately 44 characters long
+- Does not contain spaces or common URL characters like '/' or '?'
+"""
+
+
+class SheetReference(BaseModel):
+    sheet_id: str = Field(pattern=r"^[A-Za-z0-9_-]{20,}$")
+
+
+# Sheet IDs are case-sensitive, so only whitespace is normalized in the key
+sheet_id_cache = QueryCache(max_size=1024, ttl=3600.0, normalize=lambda text: " ".join(text.split()))
+
+
+@cached(sheet_id_cache)
+async def get_google_sheet_id_from_promot(user_prompt: str):
+    # URLs and bare IDs are resolved locally; the LLM is only asked when nothing matches
+    sheets = extract_google_sheet_ids(user_prompt)
+    if sheets:
+        return {"sheet_id": sheets[0]["sheet_id"], "gid": sheets[0]["gid"], "sheets": sheets}
+
+    reference = await extract("sheet_id", SheetReference, SHEET_ID_EXTRACTION_PROMPT, f"Prompt: {user_prompt}")
+    return {"sheet_id": reference.sheet_id, "gid": None, "sheets": [{"sheet_id": reference.sheet_id, "gid": None}]}
 
 
 async def main():
-    response = get_google_sheet_id_from_promot(
+    response = await get_google_sheet_id_from_promot(
         user_prompt="create the presentation by refering to the data source at https://docs.google.com/spreadsheets/d/1JJZdYpyEFsF-IXUa5Ek30wlNdAueICMf26BLUQLnbuU/edit?gid=793403375#gid=793403375")
-    w = PresentationGenerationWorkflow(timeout=100, verbose=True)
-    result = await w.run(google_sheet_id=response['sheet_id'], number_of_slides=5)
+    w = PresentationGenerationWorkflow(timeout=WORKFLOW_TIMEOUT, verbose=True)
+    handler = w.run(google_sheet_id=response['sheet_id'], number_of_slides=5)
+    async for event in handler.stream_events():
+        message = format_progress(event)
+        if message:
+            print(message)
+    result = await handler
     print(result)
+    print(get_artifact_cache().stats)
+    print(extraction_stats())
+    if tracing.is_enabled():
+        print(json.dumps(tracing.summary(), indent=2))
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
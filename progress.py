@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events.llm import LLMChatEndEvent, LLMChatInProgressEvent
+from events import (
+    ArtifactReadyEvent, LLMTokenEvent, ProgressEvent, StatusEvent, ToolCallEndEvent, ToolCallStartEvent
+)
+from typing import Callable, Optional
+import threading
+
+# Where progress events of the current run go: ctx.write_event_to_stream inside a workflow, or
+# a UI callback. Context variables follow asyncio tasks, so concurrent runs never mix events.
+_sink: ContextVar[Optional[Callable[[ProgressEvent], None]]] = ContextVar("progress_sink", default=None)
+_handler_installed = False
+_handler_lock = threading.Lock()
+_streamed_spans = set()
+
+
+def emit(event: ProgressEvent):
+    sink = _sink.get()
+    if sink is not None:
+        sink(event)
+
+
+class _LLMProgressHandler(BaseEventHandler):
+    # Forwards LLM output from llama-index instrumentation. FunctionCallingAgentWorker does not
+    # stream, so most turns arrive as one delta per LLM response; streamed chats arrive per token.
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMProgressHandler"
+
+    def handle(self, event, **kwargs):
+        if _sink.get() is None:
+            return
+        if isinstance(event, LLMChatInProgressEvent):
+            _streamed_spans.add(event.span_id)
+            if event.response.delta:
+                emit(LLMTokenEvent(delta=event.response.delta))
+        elif isinstance(event, LLMChatEndEvent):
+            if event.span_id in _streamed_spans:
+                _streamed_spans.discard(event.span_id)
+            elif event.response is not None and event.response.message.content:
+                emit(LLMTokenEvent(delta=event.response.message.content))
+
+
+def _install_handler():
+    global _handler_installed
+    with _handler_lock:
+        if not _handler_installed:
+            get_dispatcher().add_event_handler(_LLMProgressHandler())
+            _handler_installed = True
+
+
+@contextmanager
+def progress_sink(sink: Callable[[ProgressEvent], None]):
+    _install_handler()
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def format_progress(event) -> Optional[str]:
+    if isinstance(event, StatusEvent):
+        return event.message
+    if isinstance(event, ToolCallStartEvent):
+        return f"Calling {event.tool_name}..."
+    if isinstance(event, ToolCallEndEvent):
+        outcome = f"failed: {event.error}" if event.error else "done"
+        return f"{event.tool_name} {outcome} ({event.duration:.1f}s)"
+    if isinstance(event, ArtifactReadyEvent):
+        return f"Artifact ready: {event.path}"
+    return None
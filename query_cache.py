@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+import numpy as np
+import inspect
+import re
+import threading
+import time
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    # Case, surrounding punctuation and repeated whitespace do not change what the user asked for
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" .!?")
+
+
+class QueryCache:
+    # LRU + TTL cache keyed by normalized text. When an embed function is given, a miss on the
+    # exact key also checks earlier queries by cosine similarity (near-duplicate tier); only
+    # entries with the same extra key (e.g. today's date) are eligible.
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 3600.0,
+                 embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 similarity_threshold: float = 0.95, normalize: Callable[[str], str] = normalize_query):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.normalize = normalize
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0}
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any, Optional[np.ndarray]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        vector = np.asarray(self.embed([text]), dtype=np.float32)[0]
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _find_similar(self, vector: np.ndarray, extra: Hashable):
+        best_key, best_score = None, self.similarity_threshold
+        for key, (stored_at, _, stored_vector) in self._entries.items():
+            if key[1] != extra or stored_vector is None or self._expired(stored_at):
+                continue
+            score = float(stored_vector @ vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def get(self, text: str, extra: Hashable = ()) -> Any:
+        key = (self.normalize(text), extra)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                self.stats["evictions"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+
+        vector = self._embed(key[0])
+        if vector is not None:
+            with self._lock:
+                similar = self._find_similar(vector, extra)
+                if similar is not None:
+                    self._entries.move_to_end(similar)
+                    self.stats["semantic_hits"] += 1
+                    return self._entries[similar][1]
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return _MISSING
+
+    def set(self, text: str, value: Any, extra: Hashable = ()):
+        key = (self.normalize(text), extra)
+        vector = self._embed(key[0])
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cached(cache: QueryCache, extra_key: Callable[[], Hashable] = lambda: ()):
+    # Caches a function whose first argument is the user's text. extra_key is evaluated on every
+    # call, so anything the result depends on besides the text (like today's date) belongs there.
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def wrapper(text: str, *args, **kwargs):
+                extra = extra_key()
+                value = cache.get(text, extra)
+                if value is _MISSING:
+                    value = await fn(text, *args, **kwargs)
+                    cache.set(text, value, extra)
+                return value
+        else:
+            @wraps(fn)
+            def wrapper(text: str, *args, **kwargs):
+                extra = extra_key()
+                value = cache.get(text, extra)
+                if value is _MISSING:
+                    value = fn(text, *args, **kwargs)
+                    cache.set(text, value, extra)
+                return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
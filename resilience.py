@@ -0,0 +1,299 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type
+import asyncio
+import os
+import random
+import threading
+import time
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8.0"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30.0"))
+# A second copy of a request is sent once the first has taken longer than this percentile of
+# recent latencies for the upstream; HEDGING=0 turns it off
+HEDGING = os.getenv("HEDGING", "1").lower() not in ("0", "false", "no")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = 20
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, upstream: str, retry_in: float):
+        super().__init__(f"Circuit for {upstream} is open; retrying in {retry_in:.1f}s")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    # Everything started inside (including asyncio tasks and to_thread calls, which copy the
+    # context) has to finish within `seconds`; nested deadlines can only shorten it
+    if seconds is None:
+        yield
+        return
+    current = _deadline.get()
+    token = _deadline.set(min(current, time.monotonic() + seconds) if current is not None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def attempt_timeout(default: Optional[float]) -> Optional[float]:
+    # The per-attempt timeout, cut short by the deadline; raises once the deadline has passed
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+    return left if default is None else min(default, left)
+
+
+class WorkflowDeadline:
+    # Mixed into a llama-index Workflow: run() starts the step tasks, which copy the current
+    # context, so every LLM and tool call of the run stops retrying once the workflow timeout is up
+    def run(self, *args, **kwargs):
+        with deadline(getattr(self, "_timeout", None)):
+            return super().run(*args, **kwargs)
+
+
+class CircuitBreaker:
+    # Closed: calls pass and consecutive failures are counted. After failure_threshold of them the
+    # circuit opens and calls fail fast for reset_timeout; then one trial call (half-open) decides
+    # whether it closes again or stays open for another reset_timeout.
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {"rejected": 0, "opened": 0}
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open":
+                retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, retry_in)
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._trial_running:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self):
+        # The call ended without saying anything about the upstream (e.g. a client error)
+        with self._lock:
+            self._trial_running = False
+
+
+class Upstream:
+    # Retry policy, circuit breaker and recent latencies for one upstream (openai, composio)
+    def __init__(self, name: str, max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker(name)
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter: uniform in [0, base * 2^attempt], capped; a Retry-After hint wins if larger
+        delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def observe(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        with self._lock:
+            if not HEDGING or len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(HEDGE_PERCENTILE * len(ordered)))]
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _sleep_time(self, attempt: int, error: BaseException) -> Optional[float]:
+        # None when there is no time for another attempt before the deadline
+        delay = self.backoff(attempt, getattr(error, "retry_after", None))
+        left = remaining()
+        return delay if left is None or delay < left else None
+
+    async def call(self, attempt: Callable[[Optional[float]], Awaitable[Any]],
+                   retryable: Callable[[BaseException], bool], timeout: Optional[float] = None,
+                   hedge: bool = False, max_attempts: Optional[int] = None) -> Any:
+        # attempt(timeout) makes one request. Retryable failures are retried with backoff up to
+        # max_attempts and within the deadline; with hedge=True a slow attempt gets a duplicate
+        # and the first to succeed wins.
+        self._count("calls")
+        max_attempts = max_attempts or self.max_attempts
+        for number in range(max_attempts):
+            self.breaker.allow()
+            started = time.perf_counter()
+            try:
+                result = await (self._hedged(attempt, retryable, timeout) if hedge else self._attempt(attempt, timeout))
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError) or not retryable(e):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                self._count("failures")
+                sleep = self._sleep_time(number, e)
+                if number == max_attempts - 1 or sleep is None:
+                    raise
+                self._count("retries")
+                await asyncio.sleep(sleep)
+                continue
+            self.breaker.record_success()
+            self.observe(time.perf_counter() - started)
+            return result
+
+    async def _attempt(self, attempt: Callable[[Optional[float]], Awaitable[Any]], timeout: Optional[float]) -> Any:
+        self._count("attempts")
+        per_attempt = attempt_timeout(timeout)
+        try:
+            return await asyncio.wait_for(attempt(per_attempt), per_attempt)
+        except asyncio.TimeoutError:
+            if remaining() is not None and remaining() <= 0:
+                raise DeadlineExceeded("Deadline exceeded")
+            raise
+
+    async def _hedged(self, attempt: Callable[[Optional[float]], Awaitable[Any]],
+                      retryable: Callable[[BaseException], bool], timeout: Optional[float]) -> Any:
+        delay = self.hedge_delay()
+        first = asyncio.ensure_future(self._attempt(attempt, timeout))
+        if delay is None:
+            return await first
+        pending = {first}
+        error: Optional[BaseException] = None
+        # Whatever ends this call (a result, an error, or the caller being cancelled while it waits),
+        # every attempt still running is cancelled
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+
+            self._count("hedges")
+            second = asyncio.ensure_future(self._attempt(attempt, timeout))
+            pending.add(second)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+                    if not retryable(task.exception()):
+                        raise task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def call_sync(self, attempt: Callable[[], Any], retryable: Callable[[BaseException], bool],
+                  max_attempts: Optional[int] = None) -> Any:
+        # Blocking version for synchronous clients (Composio tools run in worker threads). No
+        # hedging: duplicated tool calls may have side effects.
+        self._count("calls")
+        max_attempts = max_attempts or self.max_attempts
+        for number in range(max_attempts):
+            self.breaker.allow()
+            attempt_timeout(None)
+            self._count("attempts")
+            started = time.perf_counter()
+            try:
+                result = attempt()
+            except Exception as e:
+                if not retryable(e):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                self._count("failures")
+                sleep = self._sleep_time(number, e)
+                if number == max_attempts - 1 or sleep is None:
+                    raise
+                self._count("retries")
+                time.sleep(sleep)
+                continue
+            self.breaker.record_success()
+            self.observe(time.perf_counter() - started)
+            return result
+
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str, **options) -> Upstream:
+    # options apply only when the upstream is first created
+    with _upstreams_lock:
+        if name not in _upstreams:
+            _upstreams[name] = Upstream(name, **options)
+        return _upstreams[name]
+
+
+def set_upstream(upstream: Upstream):
+    # Lets tests and benchmarks use their own retry/breaker settings
+    with _upstreams_lock:
+        _upstreams[upstream.name] = upstream
+
+
+def retry_on(*error_types: Type[BaseException]) -> Callable[[BaseException], bool]:
+    # Timeouts are always retryable, unless the deadline itself ran out
+    types: Tuple[Type[BaseException], ...] = error_types + (asyncio.TimeoutError, TimeoutError)
+    return lambda error: isinstance(error, types) and not isinstance(error, (DeadlineExceeded, CircuitOpenError))
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    with _upstreams_lock:
+        upstreams = list(_upstreams.values())
+    return {
+        upstream.name: dict(upstream.stats, breaker=upstream.breaker.state, **upstream.breaker.stats,
+                            hedge_delay=upstream.hedge_delay())
+        for upstream in upstreams
+    }
@@ -1,7 +1,16 @@
 from semantic_router import Route
-from semantic_router.layer import RouteLayer
-from semantic_router.llms.ollama import OllamaLLM
-from semantic_router.encoders import FastEmbedEncoder
+from semantic_router.schema import Message
+from query_cache import QueryCache, cached
+from worker_pool import encode, get_worker_pool
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import hashlib
+import json
+import os
+import re
+import threading
+import time
 
 calender_workflow = Route(
     name="calender_workflow",
@@ -67,10 +76,211 @@ presentation_workflow = Route(
 )
 
 
+ENCODER_NAME = "snowflake/snowflake-arctic-embed-s"
+LLM_NAME = "qwen2.5:latest"
+ROUTER_CACHE_DIR = os.getenv("ROUTER_CACHE_DIR", os.path.expanduser("~/.cache/cxo_agent/routes"))
+
+
+ROUTER_MARGIN_THRESHOLD = float(os.getenv("ROUTER_MARGIN_THRESHOLD", "0.05"))
+# Setting this enables the near-duplicate tier of the route cache (e.g. 0.97)
+ROUTE_CACHE_SIMILARITY = os.getenv("ROUTE_CACHE_SIMILARITY")
+
+
+class RouteMatch(NamedTuple):
+    name: Optional[str]
+    score: float
+
+
+@dataclass
+class RouteDecision:
+    name: Optional[str]
+    path: str  # "embedding" when decided from similarity alone, "llm" when the fallback was used
+    scores: Dict[str, float] = field(default_factory=dict)
+    margin: float = 0.0
+    elapsed: float = 0.0
+
+
+class StubLLM:
+    # Drop-in for OllamaLLM when no local model is available (tests, benchmarks)
+    def __init__(self, response: Optional[str] = None):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self, messages: List[Message]) -> Optional[str]:
+        self.calls += 1
+        return self.response
+
+
+class WorkflowRouter:
+    # Same defaults as semantic_router.RouteLayer: top 5 utterances are summed per route and
+    # the best route must have at least one utterance above the encoder's score threshold.
+    # When the best route beats the runner-up by less than margin_threshold the query is
+    # considered ambiguous and handed to the LLM; everything else never leaves the process.
+    def __init__(self, routes: List[Route], encoder_name: str = ENCODER_NAME, llm=None, llm_name: str = LLM_NAME,
+                 top_k: int = 5, margin_threshold: float = ROUTER_MARGIN_THRESHOLD,
+                 cache_dir: Optional[str] = ROUTER_CACHE_DIR, encoder=None):
+        self.routes = routes
+        pool = get_worker_pool() if encoder is None else None
+        if encoder is not None:
+            # A prebuilt encoder (e.g. a fake in tests) is used in-process as is
+            self.encoder = encoder
+            self.encoder_name, self.score_threshold = encoder.name, encoder.score_threshold
+        elif pool is not None:
+            # Worker mode: the model lives in the pool's processes only, and every encoding
+            # (utterances, queries, the route cache's near-duplicate lookups) goes through them
+            info = pool.encoder_info()
+            self.encoder = None
+            self.encoder_name, self.score_threshold = info["name"] or encoder_name, info["score_threshold"]
+        else:
+            # Imported here: the encoder pulls in fastembed/onnxruntime, which importing this
+            # module (e.g. for the route definitions) should not pay for
+            from semantic_router.encoders import FastEmbedEncoder
+
+            self.encoder = FastEmbedEncoder(name=encoder_name)
+            self.encoder_name, self.score_threshold = self.encoder.name, self.encoder.score_threshold
+        if llm is None:
+            from semantic_router.llms.ollama import OllamaLLM
+
+            llm = OllamaLLM(llm_name=llm_name)
+        self.llm = llm
+        self.top_k = top_k
+        self.margin_threshold = margin_threshold
+        self.cache_dir = cache_dir
+        self.stats = {"embedding": 0, "llm": 0}
+        self._stats_lock = threading.Lock()
+
+        # Flatten every utterance into one matrix; utterance_routes[i] is the route index of row i
+        self.route_names = [route.name for route in routes]
+        self.utterances = [utterance for route in routes for utterance in route.utterances]
+        self.utterance_routes = np.array(
+            [index for index, route in enumerate(routes) for _ in route.utterances], dtype=np.int64
+        )
+        self.index = self._load_or_encode_utterances()
+
+    def _cache_path(self) -> str:
+        payload = json.dumps([[route.name, route.utterances] for route in self.routes]).encode("utf-8")
+        digest = hashlib.sha256(payload).hexdigest()[:16]
+        model = self.encoder_name.replace("/", "__")
+        return os.path.join(self.cache_dir, f"{model}-{digest}.npy")
+
+    def _load_or_encode_utterances(self) -> np.ndarray:
+        path = self._cache_path() if self.cache_dir else None
+        if path and os.path.exists(path):
+            index = np.load(path)
+            if index.shape[0] == len(self.utterances):
+                return index
+
+        index = self.encode(self.utterances)
+        if path:
+            # Write to a temp file and rename so concurrent processes never read a partial matrix
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, index)
+            os.replace(tmp_path, path)
+        return index
+
+    def encode(self, docs: List[str]) -> np.ndarray:
+        # Unit-length rows; in worker mode computed in the pool's processes, off this process's GIL
+        if self.encoder is None:
+            return get_worker_pool().embed(docs)
+        return encode(self.encoder, docs)
+
+    def _score(self, embeddings: np.ndarray):
+        # (queries x utterances) cosine similarities in a single matrix multiply
+        scores = embeddings @ self.index.T
+        k = min(self.top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top_routes = self.utterance_routes[top]
+
+        # (queries x routes) sum and max of the top-k scores belonging to each route
+        in_route = top_routes[:, :, None] == np.arange(len(self.routes))[None, None, :]
+        route_totals = np.where(in_route, top_scores[:, :, None], 0.0).sum(axis=1)
+        route_best = np.where(in_route, top_scores[:, :, None], -np.inf).max(axis=1)
+        return route_totals, route_best
+
+    def _classify(self, embeddings: np.ndarray) -> List[RouteMatch]:
+        route_totals, route_best = self._score(embeddings)
+        best = np.argmax(route_totals, axis=1)
+        best_scores = route_best[np.arange(len(best)), best]
+        return [
+            RouteMatch(self.route_names[route] if score >= self.score_threshold else None, float(score))
+            for route, score in zip(best, best_scores)
+        ]
+
+    def _ask_llm(self, query: str) -> Optional[str]:
+        prompt = (
+            "Classify the user request into exactly one of these workflows: "
+            f"{', '.join(self.route_names)}. If none of them fits, answer none. "
+            "Reply with the workflow name only.\n\n"
+            f"Request: {query}"
+        )
+        answer = self.llm([Message(role="user", content=prompt)]) or ""
+        words = re.findall(r"[a-z_]+", answer.lower())
+        return next((word for word in words if word in self.route_names), None)
+
+    def decide(self, query: str) -> RouteDecision:
+        started = time.perf_counter()
+        route_totals, route_best = self._score(self.encode([query]))
+        totals, best_scores = route_totals[0], np.maximum(route_best[0], -1.0)
+
+        ranked = np.argsort(totals)[::-1]
+        best = int(ranked[0])
+        margin = float(best_scores[best] - best_scores[ranked[1]]) if len(ranked) > 1 else float(best_scores[best])
+        scores = {name: float(score) for name, score in zip(self.route_names, best_scores)}
+
+        if best_scores[best] >= self.score_threshold and margin >= self.margin_threshold:
+            name, path = self.route_names[best], "embedding"
+        else:
+            name, path = self._ask_llm(query), "llm"
+
+        with self._stats_lock:
+            self.stats[path] += 1
+        return RouteDecision(name=name, path=path, scores=scores, margin=margin,
+                             elapsed=time.perf_counter() - started)
+
+    def route(self, query: str) -> Optional[str]:
+        return self.decide(query).name
+
+    def get_routes(self, queries: List[str], batch_size: int = 1024) -> List[RouteMatch]:
+        matches = []
+        for start in range(0, len(queries), batch_size):
+            matches.extend(self._classify(self.encode(queries[start:start + batch_size])))
+        return matches
+
+
+_router: Optional[WorkflowRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> WorkflowRouter:
+    # Built once per process; the encoder and the utterance matrix are read-only afterwards,
+    # so the instance can be shared between threads without further locking.
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = WorkflowRouter(routes=[calender_workflow, presentation_workflow])
+    return _router
+
+
+# Routes never change at runtime, so cached decisions do not expire
+route_cache = QueryCache(
+    max_size=4096,
+    ttl=None,
+    embed=(lambda docs: get_router().encode(docs)) if ROUTE_CACHE_SIMILARITY else None,
+    similarity_threshold=float(ROUTE_CACHE_SIMILARITY or 1.0),
+)
+
+
+@cached(route_cache)
 def get_route(query: str):
-    encoder = FastEmbedEncoder(name="snowflake/snowflake-arctic-embed-s")
-    routes = [calender_workflow, presentation_workflow]
-    llm = OllamaLLM(llm_name="qwen2.5:latest")
+    return get_router().route(query)
+
+
+def get_routes(queries: List[str]) -> List[RouteMatch]:
+    return get_router().get_routes(queries)
+
 
-    sr = RouteLayer(encoder=encoder, routes=routes, llm=llm)
-    return sr(query).name
+def get_route_decision(query: str) -> RouteDecision:
+    return get_router().decide(query)
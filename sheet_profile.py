@@ -0,0 +1,193 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import json
+import os
+import re
+
+NUMBER_CLEANUP_PATTERN = re.compile(r"[,\s$€£₹%]")
+# A column is treated as numeric/date when at least this share of its non-empty cells parse
+TYPE_INFERENCE_THRESHOLD = 0.8
+MAX_CATEGORY_CARDINALITY = 50
+
+
+def values_to_frame(values: List[List[Any]]) -> pd.DataFrame:
+    # Google Sheets returns ragged rows (trailing empty cells are omitted); the first row is the header
+    if not values:
+        return pd.DataFrame()
+    header = [str(name).strip() or f"column_{index + 1}" for index, name in enumerate(values[0])]
+    width = max(len(header), *(len(row) for row in values[1:])) if len(values) > 1 else len(header)
+    header += [f"column_{index + 1}" for index in range(len(header), width)]
+    rows = [list(row) + [None] * (width - len(row)) for row in values[1:]]
+    return pd.DataFrame(rows, columns=header).replace("", np.nan)
+
+
+def load_sheet_file(path: str) -> pd.DataFrame:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".xlsx", ".xlsm", ".xls"):
+        return pd.read_excel(path)
+    return pd.read_csv(path)
+
+
+def find_sheet_values(response: Any) -> List[List[Any]]:
+    # GOOGLESHEETS_BATCH_GET nests valueRanges differently across Composio versions; take the
+    # first "values" matrix found anywhere in the response
+    if isinstance(response, dict):
+        if isinstance(response.get("values"), list):
+            return response["values"]
+        children = response.values()
+    elif isinstance(response, list):
+        children = response
+    else:
+        return []
+    for child in children:
+        values = find_sheet_values(child)
+        if values:
+            return values
+    return []
+
+
+def infer_column_types(frame: pd.DataFrame) -> pd.DataFrame:
+    typed = {}
+    for column in frame.columns:
+        series = frame[column]
+        non_null = series.dropna()
+        if non_null.empty or pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            typed[column] = series
+            continue
+
+        text = non_null.astype(str)
+        numbers = pd.to_numeric(text.str.replace(NUMBER_CLEANUP_PATTERN, "", regex=True), errors="coerce")
+        if numbers.notna().mean() >= TYPE_INFERENCE_THRESHOLD:
+            typed[column] = pd.to_numeric(
+                series.astype(str).str.replace(NUMBER_CLEANUP_PATTERN, "", regex=True), errors="coerce"
+            ).where(series.notna())
+            continue
+
+        dates = pd.to_datetime(text, errors="coerce", format="mixed")
+        if dates.notna().mean() >= TYPE_INFERENCE_THRESHOLD:
+            typed[column] = pd.to_datetime(series, errors="coerce", format="mixed")
+            continue
+
+        typed[column] = series
+    return pd.DataFrame(typed)
+
+
+def _kind(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "category"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "date"
+    if series.nunique(dropna=True) <= min(MAX_CATEGORY_CARDINALITY, max(len(series) // 2, 1)):
+        return "category"
+    return "text"
+
+
+def _round(value: Any) -> Any:
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 4)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    return value
+
+
+def _rollup_frequency(dates: pd.Series) -> str:
+    span = (dates.max() - dates.min()).days
+    if span > 3 * 365:
+        return "YS"
+    if span > 120:
+        return "MS"
+    if span > 21:
+        return "W"
+    return "D"
+
+
+def profile_frame(frame: pd.DataFrame, top_k: int = 5, max_series_points: int = 36) -> Dict[str, Any]:
+    # Everything the LLM needs to plan slides and charts, computed locally: per-column types and
+    # statistics, top-k groups of every category/number pair and time-series rollups.
+    frame = infer_column_types(frame)
+    kinds = {column: _kind(frame[column]) for column in frame.columns}
+    numbers = [column for column, kind in kinds.items() if kind == "number"]
+    categories = [column for column, kind in kinds.items() if kind == "category"]
+    dates = [column for column, kind in kinds.items() if kind == "date"]
+
+    columns = {}
+    for column, kind in kinds.items():
+        series = frame[column]
+        summary: Dict[str, Any] = {"type": kind, "non_null": int(series.notna().sum())}
+        if kind == "number":
+            described = series.describe()
+            summary.update({
+                "sum": _round(series.sum()),
+                "mean": _round(described.get("mean")),
+                "std": _round(described.get("std")),
+                "min": _round(described.get("min")),
+                "median": _round(series.median()),
+                "max": _round(described.get("max")),
+            })
+        elif kind == "date":
+            summary.update({"min": _round(series.min()), "max": _round(series.max())})
+        else:
+            counts = series.value_counts().head(top_k)
+            summary.update({
+                "unique": int(series.nunique()),
+                "top": {str(value): int(count) for value, count in counts.items()},
+            })
+        columns[str(column)] = summary
+
+    groups = []
+    for category in categories:
+        for number in numbers:
+            totals = frame.groupby(category, dropna=True)[number].agg(["sum", "mean", "count"])
+            top = totals.sort_values("sum", ascending=False).head(top_k)
+            groups.append({
+                "by": str(category),
+                "value": str(number),
+                "top": [
+                    {"group": str(group), "sum": _round(row["sum"]), "mean": _round(row["mean"]), "count": int(row["count"])}
+                    for group, row in top.iterrows()
+                ],
+            })
+
+    time_series = []
+    for date_column in dates:
+        indexed = frame.dropna(subset=[date_column]).set_index(date_column).sort_index()
+        if indexed.empty:
+            continue
+        frequency = _rollup_frequency(indexed.index.to_series())
+        for number in numbers:
+            rollup = indexed[number].resample(frequency).sum().tail(max_series_points)
+            time_series.append({
+                "date": str(date_column),
+                "value": str(number),
+                "frequency": frequency,
+                "points": [[_round(timestamp), _round(value)] for timestamp, value in rollup.items()],
+            })
+
+    return {
+        "rows": int(len(frame)),
+        "columns": columns,
+        "groups": groups,
+        "time_series": time_series,
+        "sample": [
+            {str(key): _round(value) for key, value in row.items()}
+            for row in frame.head(3).to_dict(orient="records")
+        ],
+    }
+
+
+def format_profile(profile: Dict[str, Any]) -> str:
+    return json.dumps(profile, separators=(",", ":"), default=str)
+
+
+def load_frame(values: Optional[List[List[Any]]] = None, path: Optional[str] = None) -> pd.DataFrame:
+    frame = load_sheet_file(path) if path else values_to_frame(values or [])
+    return infer_column_types(frame)
+
+
+def profile_sheet(values: Optional[List[List[Any]]] = None, path: Optional[str] = None, top_k: int = 5) -> Dict[str, Any]:
+    return profile_frame(load_frame(values=values, path=path), top_k=top_k)
@@ -0,0 +1,183 @@
+from llm_clients import create_chat_completion
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Optional, Type, TypeVar
+import copy
+import json
+import re
+import threading
+
+STRUCTURED_MODEL = "gpt-4o-2024-08-06"
+# Keywords strict structured outputs do not accept; pydantic adds them to every schema
+UNSUPPORTED_SCHEMA_KEYS = ("title", "default")
+CODE_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+Model = TypeVar("Model", bound=BaseModel)
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+class ExtractionError(ValueError):
+    pass
+
+
+def strict_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    # Strict mode wants every property required and no extra properties; optional fields stay
+    # nullable through their anyOf [..., null]
+    def walk(node):
+        if isinstance(node, dict):
+            for key in UNSUPPORTED_SCHEMA_KEYS:
+                if not isinstance(node.get(key), dict):
+                    node.pop(key, None)
+            if node.get("type") == "object" and "properties" in node:
+                node["required"] = list(node["properties"])
+                node["additionalProperties"] = False
+            for child in node.values():
+                walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+        return node
+
+    return walk(copy.deepcopy(model.model_json_schema()))
+
+
+def response_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "strict": True, "schema": strict_schema(model)},
+    }
+
+
+def _close_open(text: str) -> str:
+    # Closes a truncated reply: an unterminated string, then the open arrays/objects
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return TRAILING_COMMA_PATTERN.sub(r"\1", text.rstrip().rstrip(",") + "".join(reversed(stack)))
+
+
+def repair_json(text: str) -> str:
+    # Near-valid JSON as models tend to produce it: a code fence or prose around the object,
+    # trailing commas, Python literals, single quotes, or a reply cut off before the end
+    text = CODE_FENCE_PATTERN.sub("", text.strip())
+    start = text.find("{")
+    if start < 0:
+        raise ExtractionError("No JSON object in the reply")
+    end = text.rfind("}")
+    candidate = text[start:end + 1] if end > start else text[start:]
+    try:
+        json.loads(candidate)
+        return candidate
+    except ValueError:
+        pass
+    candidate = TRAILING_COMMA_PATTERN.sub(r"\1", candidate)
+    candidate = re.sub(r"\b(True|False|None)\b", lambda match: PYTHON_LITERALS[match.group(1)], candidate)
+    if '"' not in candidate:
+        candidate = candidate.replace("'", '"')
+    try:
+        json.loads(candidate)
+        return candidate
+    except ValueError:
+        # Possibly truncated: everything after the first brace, closed up
+        return _close_open(TRAILING_COMMA_PATTERN.sub(r"\1", text[start:]))
+
+
+def parse_model(model: Type[Model], content: Optional[str]) -> Model:
+    try:
+        return model.model_validate_json(content or "")
+    except ValidationError:
+        try:
+            return model.model_validate(json.loads(repair_json(content or "")))
+        except ValueError as e:
+            # ValidationError is a ValueError too
+            raise ExtractionError(str(e)) from e
+
+
+def _record(name: str, **counts: int):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {
+            "calls": 0, "failures": 0, "repaired": 0, "reasks": 0,
+            "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+        })
+        for key, value in counts.items():
+            entry[key] += value
+
+
+def _record_usage(name: str, usage: Any):
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    _record(name, prompt_tokens=usage.prompt_tokens or 0, completion_tokens=usage.completion_tokens or 0,
+            cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details is not None else 0)
+
+
+async def extract(name: str, model: Type[Model], system_prompt: str, user_content: str,
+                  llm: str = STRUCTURED_MODEL) -> Model:
+    # One structured-output request validated against `model`. The system prompt and schema must
+    # not vary between calls (anything per-request, like today's date, goes in user_content) so
+    # the provider can serve the prefix from its prompt cache. Near-valid replies are repaired
+    # locally; only a reply that still fails validation is sent back once with the error.
+    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]
+    _record(name, calls=1)
+    response = await create_chat_completion(model=llm, messages=messages, response_format=response_format(model))
+    _record_usage(name, response.usage)
+    content = response.choices[0].message.content
+    try:
+        return model.model_validate_json(content or "")
+    except ValidationError as e:
+        error = e
+
+    try:
+        parsed = model.model_validate(json.loads(repair_json(content or "")))
+        _record(name, repaired=1)
+        return parsed
+    except ValueError as e:
+        error = e
+
+    _record(name, reasks=1)
+    response = await create_chat_completion(model=llm, response_format=response_format(model), messages=messages + [
+        {"role": "assistant", "content": content or ""},
+        {"role": "user", "content": f"That reply was not valid: {error}. Reply with the corrected JSON object only."},
+    ])
+    _record_usage(name, response.usage)
+    try:
+        return parse_model(model, response.choices[0].message.content)
+    except ExtractionError:
+        _record(name, failures=1)
+        raise
+
+
+def extraction_stats() -> Dict[str, Dict[str, Any]]:
+    # Per extraction: token totals, how much of the prompt the provider served from its cache,
+    # and how often replies needed a repair, a re-ask, or failed altogether
+    with _stats_lock:
+        result = {name: dict(entry) for name, entry in _stats.items()}
+    for entry in result.values():
+        calls = entry["calls"] or 1
+        entry["failure_rate"] = entry["failures"] / calls
+        entry["cached_share"] = entry["cached_tokens"] / entry["prompt_tokens"] if entry["prompt_tokens"] else 0.0
+        entry["avg_prompt_tokens"] = entry["prompt_tokens"] / calls
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,30 @@
+from app_startup import Warmup, current_warmup
+import threading
+
+import pytest
+
+
+def test_a_failed_warmup_is_started_again():
+    # The first loader fails only once the test lets it, so it is still running when first checked
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ZeroDivisionError
+
+    loaders = [failing, lambda: "loaded"]
+
+    # Stands in for an st.cache_resource function
+    def factory():
+        if not hasattr(factory, "warmup"):
+            factory.warmup = Warmup("test", loaders.pop(0))
+        return factory.warmup
+
+    factory.clear = lambda: delattr(factory, "warmup")
+
+    first = current_warmup(factory)
+    release.set()
+    with pytest.raises(ZeroDivisionError):
+        first.result(timeout=5)
+    assert current_warmup(factory).result(timeout=5) == "loaded"
+    assert current_warmup(factory) is factory.warmup
@@ -0,0 +1,55 @@
+from artifact_cache import ArtifactCache, CachedDeck, slide_columns
+import os
+import time
+
+import artifact_cache
+
+SPEC = {
+    "column_hashes": {"Region": "r", "Revenue": "a", "Units": "u"},
+    "outline": {"slides": [{"columns": ["Region", "Revenue"]}, {"columns": []}, {"columns": ["Units"]}, {}]},
+    "slides": [
+        {"chart": {"data": {"by": "Region", "values": ["Revenue"]}}},
+        {"bullets": ["Revenue grew 12% to 1.2M"]},
+        {"chart": {"data": {"by": "Region", "values": ["Units"]}}},
+        {"chart": {"data": {"categories": ["North"], "series": [{"name": "Revenue", "values": [1]}]}}},
+    ],
+}
+
+
+def test_slides_without_column_references_depend_on_every_column():
+    assert slide_columns(SPEC["outline"]["slides"][1], SPEC["slides"][1]) is None
+    assert slide_columns(SPEC["outline"]["slides"][3], SPEC["slides"][3]) is None
+
+    cache = ArtifactCache("unused")
+    previous = CachedDeck(key="k", deck_path="", spec=SPEC)
+    assert cache.affected_slides(previous, {"Region": "r", "Revenue": "b", "Units": "u"}) == [0, 1, 3]
+    assert cache.affected_slides(previous, dict(SPEC["column_hashes"])) == []
+
+
+def _put(cache, tmp_path, key, size=1000):
+    deck = tmp_path / f"{key}.pptx"
+    deck.write_bytes(b"x" * size)
+    return cache.put(key, key, str(deck), {"slides": []})
+
+
+def test_recently_used_entries_are_not_evicted(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "decks"), max_bytes=1500)
+    first = _put(cache, tmp_path, "a" * 32)
+    # Over budget, but the first entry was just written
+    _put(cache, tmp_path, "b" * 32)
+    assert os.path.exists(first.deck_path)
+
+    old = time.time() - artifact_cache.EVICTION_GRACE - 1
+    os.utime(os.path.dirname(first.deck_path), (old, old))
+    cache.evict()
+    assert not os.path.exists(first.deck_path)
+    assert cache.get("b" * 32) is not None
+    assert not [name for name in os.listdir(tmp_path / "decks") if name.endswith(".tmp")]
+
+
+def test_storing_an_existing_deck_keeps_the_entry_in_place(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "decks"))
+    first = _put(cache, tmp_path, "a" * 32)
+    inode = os.stat(first.deck_path).st_ino
+    _put(cache, tmp_path, "a" * 32)
+    assert os.stat(first.deck_path).st_ino == inode
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+import random
+
+from calendar_availability import AvailabilityService, BusyIndex, FakeCalendarBackend
+
+
+def brute_first_free(intervals, duration, window_start, window_end):
+    # Every free slot starts at the window start or at the end of some busy block
+    candidates = sorted({window_start} | {end for _, end in intervals if end > window_start})
+    for candidate in candidates:
+        if candidate + duration > window_end:
+            return None
+        if all(end <= candidate or start >= candidate + duration for start, end in intervals):
+            return candidate
+    return None
+
+
+def test_first_free_matches_a_brute_force_search():
+    rng = random.Random(7)
+    for _ in range(300):
+        intervals = []
+        for _ in range(rng.randint(0, 25)):
+            start = rng.randint(0, 500)
+            intervals.append((start, start + rng.randint(1, 40)))
+        index = BusyIndex(intervals)
+        window_start = rng.randint(0, 400)
+        window_end = window_start + rng.randint(0, 300)
+        duration = rng.randint(1, 60)
+        assert index.first_free(duration, window_start, window_end) == \
+            brute_first_free(intervals, duration, window_start, window_end)
+
+
+def test_conflict_and_union():
+    first = BusyIndex([(10, 20), (15, 30), (50, 60)])
+    second = BusyIndex([(30, 40)])
+    assert list(zip(first.starts, first.ends)) == [(10, 30), (50, 60)]
+    assert first.conflict(0, 10) is None
+    assert first.conflict(25, 35) == (10, 30)
+    assert first.conflict(40, 55) == (50, 60)
+    assert first.conflict(30, 50) is None
+
+    group = BusyIndex.union([first, second])
+    assert list(zip(group.starts, group.ends)) == [(10, 40), (50, 60)]
+    assert group.first_free(10, 0, 100) == 0
+    assert group.first_free(11, 0, 100) == 60
+
+
+def test_free_slot_respects_working_hours_and_every_user():
+    backend = FakeCalendarBackend({
+        "ana": [("2026-03-02T09:00:00+00:00", "2026-03-02T12:00:00+00:00", "Standup")],
+        "ben": [("2026-03-02T12:00:00+00:00", "2026-03-02T17:30:00+00:00", "Workshop")],
+    })
+    service = AvailabilityService(backend)
+    window = (datetime(2026, 3, 2, 6, tzinfo=timezone.utc), datetime(2026, 3, 4, tzinfo=timezone.utc))
+    assert service.find_free_slot(["ana", "ben"], 60, *window) == datetime(2026, 3, 3, 9, tzinfo=timezone.utc)
+    assert service.find_free_slot(["ana", "ben"], 30, *window) == datetime(2026, 3, 2, 17, 30, tzinfo=timezone.utc)
+    assert service.find_free_slot(["ana"], 60, *window, working_hours=None) == window[0]
+    # The group's merged index is reused instead of being rebuilt per query
+    assert backend.calls["list"] == 1
+
+
+def test_booking_invalidates_and_the_next_query_refetches():
+    backend = FakeCalendarBackend({"ana": []})
+    service = AvailabilityService(backend)
+    start = datetime(2026, 3, 2, 10, tzinfo=timezone.utc)
+    end = datetime(2026, 3, 2, 11, tzinfo=timezone.utc)
+
+    assert service.conflict("ana", start, end) is None
+    assert service.conflict("ana", start, end) is None
+    assert backend.calls["list"] == 1
+    assert service.stats["hits"] == 1
+
+    service.book("ana", start, end, "Review")
+    assert service.stats["invalidations"] == 1
+    assert service.conflict("ana", start, end) == (start.timestamp(), end.timestamp())
+    assert backend.calls["list"] == 2
@@ -0,0 +1,22 @@
+from calendar_prompt_parser import parse_calendar_prompt
+from datetime import date
+
+import pytest
+
+TODAY = date(2026, 10, 17)
+
+
+@pytest.mark.parametrize("text, timeslot", [
+    ("Block off 10 AM to 11:30 AM on Tuesday", "10:00 AM - 11:30 AM"),
+    ("11 to 1 PM with Ravi", "11:00 AM - 01:00 PM"),
+    ("meeting with Priya 11pm to 1am tomorrow", "11:00 PM - 01:00 AM"),
+    ("deploy window with ops 22:00-01:00", "10:00 PM - 01:00 AM"),
+])
+def test_time_ranges(text, timeslot):
+    assert parse_calendar_prompt(text, today=TODAY)["timeslot"] == timeslot
+
+
+def test_times_do_not_leak_into_the_intent():
+    details = parse_calendar_prompt("meeting with Priya 11pm to 1am tomorrow", today=TODAY)
+    assert details["intent"] == "create_meeting with Priya"
+    assert details["date"] == "2026-10-18"
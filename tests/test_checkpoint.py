@@ -0,0 +1,46 @@
+from checkpoint import CheckpointStore
+
+
+def test_an_unfinished_run_is_resumed_once_with_its_checkpoints(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    run_id, resumed = store.start_run("presentation", "key", "first")
+    assert (run_id, resumed) == ("first", False)
+    store.save_many(run_id, {"column_hashes": {"Revenue": "a"}, "slide:0": {"index": 0}})
+    store.release(run_id)
+
+    assert store.start_run("presentation", "key", "second") == ("first", True)
+    assert store.load("first") == {"column_hashes": {"Revenue": "a"}, "slide:0": {"index": 0}}
+    # Still claimed by the resumed run
+    assert store.start_run("presentation", "key", "third") == ("third", False)
+
+
+def test_discarded_and_finished_runs_restore_nothing(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    run_id, _ = store.start_run("presentation", "key", "first")
+    store.save(run_id, "outline", {"slides": []})
+    store.discard(run_id)
+    assert store.load(run_id) == {}
+
+    store.finish(run_id)
+    store.release(run_id)
+    assert store.start_run("presentation", "key", "second") == ("second", False)
+
+
+def test_two_processes_never_resume_the_same_run(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    first, second = CheckpointStore(path), CheckpointStore(path)
+    run_id, _ = first.start_run("presentation", "key", "crashed")
+    first.release(run_id)
+
+    assert first.start_run("presentation", "key", "a") == ("crashed", True)
+    assert second.start_run("presentation", "key", "b") == ("b", False)
+
+
+def test_a_run_left_running_is_resumed_after_its_lease(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    CheckpointStore(path).start_run("presentation", "key", "dead")
+
+    store = CheckpointStore(path)
+    assert store.start_run("presentation", "key", "early") == ("early", False)
+    store.finish("early")
+    assert CheckpointStore(path, lease=0.0).start_run("presentation", "key", "late") == ("dead", True)
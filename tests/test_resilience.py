@@ -0,0 +1,156 @@
+from mock_llm_server import MockLLMServer
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, Upstream, deadline, retry_on
+import asyncio
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+retryable = retry_on(urllib.error.URLError)
+
+
+def completion(base_url):
+    # One attempt against the mock server; HTTP errors are URLErrors, socket timeouts TimeoutErrors
+    def request(timeout):
+        body = json.dumps({"model": "mock", "messages": []}).encode("utf-8")
+        http_request = urllib.request.Request(f"{base_url}/chat/completions", data=body,
+                                              headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    return lambda timeout: asyncio.to_thread(request, timeout)
+
+
+def make_upstream(**breaker_options):
+    return Upstream("mock", max_attempts=3, base_delay=0.01, max_delay=0.02,
+                    breaker=CircuitBreaker("mock", **breaker_options))
+
+
+def test_failures_are_retried_until_one_succeeds():
+    # Seeded so the first two requests fail and the third succeeds
+    with MockLLMServer(latency=0.01, failure_rate=0.5, seed=3) as mock:
+        upstream = make_upstream()
+        response = asyncio.run(upstream.call(completion(mock.base_url), retryable, timeout=2.0))
+
+    assert response["choices"][0]["message"]["content"]
+    assert upstream.stats["retries"] == mock.failures
+    assert upstream.breaker.state == "closed"
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_successful_trial():
+    upstream = make_upstream(failure_threshold=2, reset_timeout=0.2)
+    with MockLLMServer(latency=0.01, failure_rate=1.0) as mock:
+        # The second failure opens the circuit, so the third attempt is refused without a request
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(upstream.call(completion(mock.base_url), retryable, timeout=2.0))
+        assert upstream.breaker.state == "open"
+        assert mock.requests == 2
+        requests = mock.requests
+
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(upstream.call(completion(mock.base_url), retryable, timeout=2.0))
+        assert mock.requests == requests
+
+        mock.failure_rate = 0.0
+        time.sleep(0.25)
+        asyncio.run(upstream.call(completion(mock.base_url), retryable, timeout=2.0))
+    assert upstream.breaker.state == "closed"
+    assert upstream.breaker.stats["opened"] == 1
+
+
+def test_client_errors_do_not_count_against_the_breaker():
+    upstream = make_upstream(failure_threshold=1)
+
+    async def attempt(timeout):
+        raise ValueError("bad request")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            asyncio.run(upstream.call(attempt, retryable))
+    assert upstream.breaker.state == "closed"
+    assert upstream.stats["attempts"] == 3
+
+
+def test_a_slow_request_is_hedged(monkeypatch):
+    monkeypatch.setattr("resilience.HEDGING", True)
+    upstream = make_upstream()
+    for _ in range(20):
+        upstream.observe(0.02)
+
+    async def run(base_url):
+        latencies = []
+        for _ in range(10):
+            started = time.perf_counter()
+            await upstream.call(completion(base_url), retryable, timeout=5.0, hedge=True)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    with MockLLMServer(latency=0.02, slow_rate=0.3, slow_latency=0.5, seed=1) as mock:
+        latencies = asyncio.run(run(mock.base_url))
+
+    assert mock.slow > 0
+    assert upstream.stats["hedge_wins"] > 0
+    assert sorted(latencies)[len(latencies) // 2] < 0.25
+
+
+def test_retries_stop_at_the_deadline():
+    upstream = Upstream("mock", max_attempts=50, base_delay=0.05, max_delay=0.05,
+                        breaker=CircuitBreaker("mock", failure_threshold=100))
+
+    async def run(base_url):
+        with deadline(0.3):
+            await upstream.call(completion(base_url), retryable, timeout=2.0)
+
+    with MockLLMServer(latency=0.05, failure_rate=1.0) as mock:
+        started = time.perf_counter()
+        with pytest.raises((urllib.error.HTTPError, DeadlineExceeded)):
+            asyncio.run(run(mock.base_url))
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.6
+    assert upstream.stats["attempts"] < 50
+
+
+def test_a_deadline_cuts_a_slow_attempt_short():
+    upstream = make_upstream()
+
+    async def run(base_url):
+        with deadline(0.2):
+            await upstream.call(completion(base_url), retryable, timeout=5.0)
+
+    with MockLLMServer(latency=1.0) as mock:
+        started = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run(mock.base_url))
+    assert time.perf_counter() - started < 0.6
+
+
+def test_cancelling_a_hedged_call_cancels_its_attempt(monkeypatch):
+    monkeypatch.setattr("resilience.HEDGING", True)
+    upstream = make_upstream()
+    for _ in range(20):
+        upstream.observe(1.0)
+    cancelled = []
+
+    async def attempt(timeout):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        call = asyncio.ensure_future(upstream.call(attempt, retryable, hedge=True))
+        # Cancelled while still waiting for the first attempt, before any hedge is sent
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0.05)
+        # Checked before asyncio.run() cancels whatever is left over
+        assert cancelled == [True]
+
+    asyncio.run(run())
+    assert upstream.stats["hedges"] == 0
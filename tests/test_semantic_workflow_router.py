@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("semantic_router")
+
+from semantic_router import Route
+
+from semantic_workflow_router import StubLLM, WorkflowRouter
+
+
+class KeywordEncoder:
+    # One dimension per keyword, so the similarities are known exactly
+    name = "keywords"
+    score_threshold = 0.5
+
+    def __call__(self, docs):
+        return [[doc.count("meeting"), doc.count("slides")] for doc in docs]
+
+
+ROUTES = [
+    Route(name="calender_workflow", utterances=["meeting", "book a meeting"]),
+    Route(name="presentation_workflow", utterances=["slides", "make slides"]),
+]
+
+
+def make_router(llm, margin_threshold):
+    return WorkflowRouter(ROUTES, llm=llm, margin_threshold=margin_threshold, cache_dir=None,
+                          encoder=KeywordEncoder())
+
+
+def test_a_clear_margin_is_decided_by_the_embeddings_alone():
+    llm = StubLLM("presentation_workflow")
+    router = make_router(llm, margin_threshold=0.05)
+    decision = router.decide("set up a meeting")
+    assert (decision.name, decision.path) == ("calender_workflow", "embedding")
+    assert decision.scores == pytest.approx({"calender_workflow": 1.0, "presentation_workflow": 0.0})
+    assert decision.margin == pytest.approx(1.0)
+    assert decision.elapsed > 0
+    assert llm.calls == 0
+    assert router.stats == {"embedding": 1, "llm": 0}
+
+
+@pytest.mark.parametrize("margin_threshold, path", [(0.4, "embedding"), (0.5, "llm")])
+def test_the_margin_threshold_decides_when_the_llm_is_asked(margin_threshold, path):
+    # Cosine scores 2/sqrt(5) and 1/sqrt(5): a margin of about 0.447
+    llm = StubLLM("presentation_workflow")
+    router = make_router(llm, margin_threshold)
+    decision = router.decide("meeting meeting about slides")
+    assert decision.margin == pytest.approx(0.4472, abs=1e-3)
+    assert decision.path == path
+    assert decision.name == ("calender_workflow" if path == "embedding" else "presentation_workflow")
+    assert llm.calls == (path == "llm")
+    assert router.stats[path] == 1
+
+
+def test_a_query_matching_no_route_goes_to_the_llm():
+    llm = StubLLM("none")
+    router = make_router(llm, margin_threshold=0.05)
+    decision = router.decide("what is the weather")
+    assert (decision.name, decision.path) == (None, "llm")
+    assert llm.calls == 1
+    assert router.stats == {"embedding": 0, "llm": 1}
@@ -0,0 +1,48 @@
+from resilience import CircuitBreaker, Upstream, set_upstream
+
+import pytest
+
+pytest.importorskip("composio_llamaindex")
+
+from tool_registry import guarded_tool_call
+
+
+@pytest.fixture
+def composio():
+    upstream = Upstream("composio", max_attempts=3, base_delay=0.0, max_delay=0.0,
+                        breaker=CircuitBreaker("composio", failure_threshold=2))
+    set_upstream(upstream)
+    return upstream
+
+
+def test_client_errors_are_returned_without_retrying_or_opening_the_circuit(composio):
+    calls = []
+    not_found = {"successful": False, "data": {"status_code": 404}, "error": "Requested entity was not found."}
+
+    def call():
+        calls.append(1)
+        return not_found
+
+    for _ in range(3):
+        assert guarded_tool_call("GOOGLESHEETS_BATCH_GET", call) == not_found
+    assert len(calls) == 3
+    assert composio.breaker.state == "closed"
+    assert guarded_tool_call("GOOGLECALENDAR_CREATE_EVENT", lambda: {"successful": True}) == {"successful": True}
+
+
+def test_transient_read_failures_are_retried(composio):
+    responses = [{"successful": False, "error": "503 Service Unavailable"}, {"successful": True, "data": {}}]
+
+    assert guarded_tool_call("GOOGLESHEETS_BATCH_GET", lambda: responses.pop(0)) == {"successful": True, "data": {}}
+    assert composio.stats["retries"] == 1
+
+
+def test_writes_are_not_retried(composio):
+    calls = []
+
+    def call():
+        calls.append(1)
+        return {"successful": False, "error": "503 Service Unavailable"}
+
+    guarded_tool_call("GOOGLECALENDAR_CREATE_EVENT", call)
+    assert len(calls) == 1
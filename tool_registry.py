@@ -0,0 +1,304 @@
+from composio_llamaindex import ComposioToolSet
+from llama_index.core.tools import FunctionTool, ToolMetadata
+from pydantic import create_model
+from events import ToolCallEndEvent, ToolCallStartEvent
+from progress import emit
+from resilience import get_upstream, retry_on
+from tracing import span
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+TOOL_SNAPSHOT_DIR = os.getenv("TOOL_SNAPSHOT_DIR", os.path.expanduser("~/.cache/cxo_agent/tools"))
+TOOL_SCHEMA_TTL = float(os.getenv("TOOL_SCHEMA_TTL", "86400"))
+# Actions that only read are safe to repeat; anything else (creating events, ...) is tried once
+READ_ACTION_MARKERS = ("_GET", "_FIND", "_LIST", "_FETCH", "_SEARCH")
+# Unsuccessful responses that say the service itself is struggling; anything else (a bad sheet ID,
+# missing permissions, ...) is the caller's problem and neither retried nor held against Composio
+TRANSIENT_STATUS_PATTERN = re.compile(r"\b(?:429|5\d\d)\b")
+TRANSIENT_ERROR_MARKERS = ("timeout", "timed out", "rate limit", "too many requests", "temporarily",
+                           "unavailable", "connection reset", "connection refused", "internal server error",
+                           "bad gateway")
+
+
+class ToolCallFailed(Exception):
+    def __init__(self, response: Any):
+        super().__init__(str(response.get("error") or "Tool call failed"))
+        self.response = response
+
+    @property
+    def transient(self) -> bool:
+        data = self.response.get("data")
+        status = self.response.get("status_code") or (data.get("status_code") if isinstance(data, dict) else None)
+        if status is not None:
+            return str(status) == "429" or str(status).startswith("5")
+        message = str(self.response.get("error") or "").lower()
+        return bool(TRANSIENT_STATUS_PATTERN.search(message)) or any(
+            marker in message for marker in TRANSIENT_ERROR_MARKERS
+        )
+
+
+def _is_read_action(name: str) -> bool:
+    return any(part in name.upper() for part in READ_ACTION_MARKERS)
+
+
+_transport_error = retry_on(ConnectionError, OSError)
+
+
+def _retryable(error: BaseException) -> bool:
+    if isinstance(error, ToolCallFailed):
+        return error.transient
+    return _transport_error(error)
+
+
+def guarded_tool_call(name: str, call: Callable[[], Any]) -> Any:
+    # Runs one Composio call behind the "composio" circuit breaker and the caller's deadline.
+    # Reads are retried with backoff, including unsuccessful responses that look transient (5xx,
+    # 429, timeouts); writes get a single attempt. Client errors pass the breaker untouched.
+    read = _is_read_action(name)
+
+    def attempt():
+        output = call()
+        if read and isinstance(output, dict) and not output.get("successful", output.get("successfull", True)):
+            raise ToolCallFailed(output)
+        return output
+
+    try:
+        return get_upstream("composio").call_sync(attempt, _retryable, max_attempts=None if read else 1)
+    except ToolCallFailed as e:
+        # Out of retries: hand back the last response, as an unguarded call would have
+        return e.response
+
+
+def instrument_tool(tool: FunctionTool) -> FunctionTool:
+    # Composio tools are synchronous HTTP calls; FunctionTool.acall would run them on the event
+    # loop. Running them in a worker thread keeps agent.achat() from blocking other workflows.
+    # Both paths report start/end to the current progress sink from the caller's thread.
+    fn = tool.fn
+    name = tool.metadata.name
+
+    def call(*args, **kwargs):
+        emit(ToolCallStartEvent(tool_name=name, arguments=kwargs))
+        started = time.perf_counter()
+        try:
+            with span(name, "tool"):
+                output = guarded_tool_call(name, lambda: fn(*args, **kwargs))
+        except Exception as e:
+            emit(ToolCallEndEvent(tool_name=name, duration=time.perf_counter() - started, error=str(e)))
+            raise
+        emit(ToolCallEndEvent(tool_name=name, duration=time.perf_counter() - started))
+        return output
+
+    async def async_call(*args, **kwargs):
+        emit(ToolCallStartEvent(tool_name=name, arguments=kwargs))
+        started = time.perf_counter()
+        try:
+            with span(name, "tool"):
+                output = await asyncio.to_thread(guarded_tool_call, name, lambda: fn(*args, **kwargs))
+        except Exception as e:
+            emit(ToolCallEndEvent(tool_name=name, duration=time.perf_counter() - started, error=str(e)))
+            raise
+        emit(ToolCallEndEvent(tool_name=name, duration=time.perf_counter() - started))
+        return output
+
+    return FunctionTool(fn=call, metadata=tool.metadata, async_fn=async_call)
+
+
+class _Entry:
+    def __init__(self, tools: List[FunctionTool], loaded_at: float):
+        self.tools = tools
+        self.loaded_at = loaded_at
+        self.refreshing = False
+
+
+class ToolRegistry:
+    # Process-wide cache of Composio tools keyed by the requested apps/actions. Schemas are
+    # fetched once, written to a JSON snapshot for the next cold start, and refreshed in a
+    # background thread once older than ttl; callers keep getting the cached tools meanwhile.
+    def __init__(self, toolset_factory: Callable[[], Any] = ComposioToolSet, ttl: float = TOOL_SCHEMA_TTL,
+                 snapshot_dir: Optional[str] = TOOL_SNAPSHOT_DIR):
+        self.toolset_factory = toolset_factory
+        self.ttl = ttl
+        self.snapshot_dir = snapshot_dir
+        self.stats = {"hits": 0, "snapshot_loads": 0, "fetches": 0, "refreshes": 0}
+        self._toolset = None
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def toolset(self):
+        with self._lock:
+            if self._toolset is None:
+                self._toolset = self.toolset_factory()
+            return self._toolset
+
+    @staticmethod
+    def _key(apps: Optional[Sequence] = None, actions: Optional[Sequence] = None) -> Tuple:
+        return tuple(sorted(str(app) for app in apps or ())), tuple(sorted(str(action) for action in actions or ()))
+
+    def _snapshot_path(self, key: Tuple) -> Optional[str]:
+        if not self.snapshot_dir:
+            return None
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.snapshot_dir, f"tools-{digest}.json")
+
+    def _wrap(self, schemas: List[Dict[str, Any]]) -> List[FunctionTool]:
+        # _wrap_tool is what ComposioToolSet.get_tools uses internally to turn a schema into a tool
+        return [
+            instrument_tool(self.toolset._wrap_tool(schema=schema, entity_id=self.toolset.entity_id))
+            for schema in schemas
+        ]
+
+    def _fetch_schemas(self, apps, actions) -> List[Dict[str, Any]]:
+        self.stats["fetches"] += 1
+        schemas = self.toolset.get_action_schemas(apps=apps, actions=actions)
+        return [schema.model_dump(exclude_none=True) for schema in schemas]
+
+    def _write_snapshot(self, key: Tuple, schemas: List[Dict[str, Any]]):
+        path = self._snapshot_path(key)
+        if path is None:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"key": key, "schemas": schemas}, file)
+        os.replace(tmp_path, path)
+
+    def _read_snapshot(self, key: Tuple) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        path = self._snapshot_path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as file:
+                return json.load(file)["schemas"], os.path.getmtime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _load(self, key: Tuple, apps, actions) -> _Entry:
+        snapshot = self._read_snapshot(key)
+        if snapshot is not None:
+            self.stats["snapshot_loads"] += 1
+            schemas, written_at = snapshot
+            # Snapshot age counts towards the TTL (wall clock -> monotonic)
+            return _Entry(self._wrap(schemas), time.monotonic() - (time.time() - written_at))
+
+        schemas = self._fetch_schemas(apps, actions)
+        self._write_snapshot(key, schemas)
+        return _Entry(self._wrap(schemas), time.monotonic())
+
+    def _refresh(self, key: Tuple, apps, actions):
+        try:
+            schemas = self._fetch_schemas(apps, actions)
+            self._write_snapshot(key, schemas)
+            with self._lock:
+                self._entries[key] = _Entry(self._wrap(schemas), time.monotonic())
+                self.stats["refreshes"] += 1
+        except Exception as e:
+            # Keep serving the previous tools; the next access past the TTL tries again
+            print(f"Refreshing tool schemas failed: {e}")
+            with self._lock:
+                self._entries[key].refreshing = False
+
+    def get_tools(self, apps: Optional[Sequence] = None, actions: Optional[Sequence] = None) -> List[FunctionTool]:
+        key = self._key(apps, actions)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = self._load(key, apps, actions)
+            else:
+                self.stats["hits"] += 1
+
+            if time.monotonic() - entry.loaded_at > self.ttl and not entry.refreshing:
+                entry.refreshing = True
+                threading.Thread(target=self._refresh, args=(key, apps, actions), daemon=True).start()
+            return entry.tools
+
+
+class FakeToolSet:
+    # Offline stand-in for ComposioToolSet: serves the given schemas and routes every tool call
+    # to handler(action_name, arguments) instead of the Composio API. Each call takes `latency`
+    # seconds and failure_rate of them return an unsuccessful Composio response.
+    entity_id = "default"
+
+    def __init__(self, schemas: List[Dict[str, Any]], handler: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+                 latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.schemas = schemas
+        self.handler = handler or (lambda name, arguments: {"successful": True, "data": {}, "error": None})
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self._random = random.Random(seed)
+
+    def get_action_schemas(self, apps=None, actions=None):
+        wanted = {str(action) for action in actions or ()}
+        apps = {str(app).lower() for app in apps or ()}
+        return [
+            _FakeSchema(schema) for schema in self.schemas
+            if schema["name"] in wanted or schema.get("appName", "").lower() in apps
+        ]
+
+    def execute_action(self, action, params: Dict[str, Any], entity_id: Optional[str] = None):
+        self.calls.append((str(action), params))
+        if self.latency:
+            time.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            return {"successful": False, "data": {}, "error": "Injected failure"}
+        return self.handler(str(action), params)
+
+    def _wrap_tool(self, schema: Dict[str, Any], entity_id: Optional[str] = None) -> FunctionTool:
+        name = schema["name"]
+        properties = schema.get("parameters", {}).get("properties", {})
+        required = set(schema.get("parameters", {}).get("required", []))
+        fn_schema = create_model(
+            name, **{field: (Any, ... if field in required else None) for field in properties}
+        )
+
+        def call(**kwargs):
+            return self.execute_action(name, kwargs, entity_id=entity_id)
+
+        metadata = ToolMetadata(name=name, description=schema.get("description", name), fn_schema=fn_schema)
+        return FunctionTool(fn=call, metadata=metadata)
+
+
+class _FakeSchema:
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+
+    def model_dump(self, exclude_none: bool = False) -> Dict[str, Any]:
+        return dict(self.schema)
+
+
+_registry: Optional[ToolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_tool_registry() -> ToolRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ToolRegistry()
+    return _registry
+
+
+def set_tool_registry(registry: ToolRegistry):
+    # Lets tests and benchmarks swap in a registry backed by FakeToolSet
+    global _registry
+    _registry = registry
+
+
+def get_tools(apps: Optional[Sequence] = None, actions: Optional[Sequence] = None) -> List[FunctionTool]:
+    return get_tool_registry().get_tools(apps=apps, actions=actions)
+
+
+def execute_action(action, params: Dict[str, Any]) -> Any:
+    # Direct (non-agent) tool call through the registry's toolset, traced like agent tool calls
+    toolset = get_tool_registry().toolset
+    with span(str(action), "tool"):
+        return guarded_tool_call(str(action), lambda: toolset.execute_action(action=action, params=params))
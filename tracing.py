@@ -0,0 +1,307 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+# USD per million (prompt, completion) tokens, for cost estimates in the summary. Calls to models
+# missing here are counted as unpriced rather than costed at zero
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4": (30.00, 60.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+_enabled = os.getenv("TRACING", "").lower() in ("1", "true", "yes")
+_jsonl_path: Optional[str] = os.getenv("TRACE_JSONL_PATH") or None
+_tracer = None
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_current_root: ContextVar[Optional["Span"]] = ContextVar("current_workflow_span", default=None)
+_lock = threading.Lock()
+_aggregates: Dict[str, Dict[str, Any]] = {}
+_llm_spans: Dict[str, "Span"] = {}
+_handler_installed = False
+_NOOP = nullcontext()
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    parent_id: Optional[str] = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_time: float = field(default_factory=time.time)
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _otel_span: Any = field(default=None, repr=False)
+    # On workflow spans: events returned or sent by a traced step (by id, with the event itself so
+    # the id cannot be reused meanwhile) and when, until the step consuming them starts or the run ends
+    _emitted: Dict[int, Tuple[Any, float]] = field(default_factory=dict, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "kind": self.kind, "trace_id": self.trace_id, "span_id": self.span_id,
+            "parent_id": self.parent_id, "start_time": self.start_time, "duration": self.duration,
+            "error": self.error, "attributes": self.attributes,
+        }
+
+
+def configure(enabled: bool = True, jsonl_path: Optional[str] = None, otel: bool = False):
+    # Spans go to the JSONL file (one span per line) and, with otel=True, to the OpenTelemetry
+    # tracer provider configured by the application
+    global _enabled, _jsonl_path, _tracer
+    _enabled = enabled
+    _jsonl_path = jsonl_path
+    if otel:
+        from opentelemetry import trace
+
+        _tracer = trace.get_tracer("cxo_agent")
+    if enabled:
+        _install_llm_handler()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def start_span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes) -> Span:
+    parent = parent or _current.get()
+    if parent is not None:
+        # Children inherit the workflow name so the summary can group every span by workflow
+        attributes.setdefault("workflow", parent.attributes.get("workflow"))
+    span = Span(name=name, kind=kind, trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+                parent_id=parent.span_id if parent else None, attributes=attributes)
+    if _tracer is not None:
+        from opentelemetry import trace
+
+        context = trace.set_span_in_context(parent._otel_span) if parent is not None and parent._otel_span else None
+        span._otel_span = _tracer.start_span(name, context=context, start_time=int(span.start_time * 1e9))
+    return span
+
+
+def finish_span(span: Span, error: Optional[BaseException] = None):
+    span.duration = time.perf_counter() - span._started
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    if span._otel_span is not None:
+        for key, value in span.attributes.items():
+            if value is not None:
+                span._otel_span.set_attribute(f"cxo.{key}", value if isinstance(value, (str, bool, int, float)) else str(value))
+        if span.error:
+            span._otel_span.set_attribute("error", span.error)
+        span._otel_span.end(end_time=int((span.start_time + span.duration) * 1e9))
+    _aggregate(span)
+    if _jsonl_path:
+        line = json.dumps(span.to_dict(), default=str)
+        with _lock:
+            with open(_jsonl_path, "a") as file:
+                file.write(line + "\n")
+
+
+@contextmanager
+def _span(name: str, kind: str, attributes: Dict[str, Any]):
+    current = start_span(name, kind, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        finish_span(current, e)
+        raise
+    else:
+        finish_span(current)
+    finally:
+        _current.reset(token)
+
+
+def span(name: str, kind: str = "internal", **attributes):
+    # Yields the Span, or None when tracing is disabled (a shared no-op context manager)
+    if not _enabled:
+        return _NOOP
+    return _span(name, kind, attributes)
+
+
+def record_usage(span: Optional[Span], usage: Any, model: Optional[str] = None):
+    if span is None or usage is None:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda key, default=None: getattr(usage, key, default)
+    span.attributes["prompt_tokens"] = get("prompt_tokens", 0) or 0
+    span.attributes["completion_tokens"] = get("completion_tokens", 0) or 0
+    if model:
+        span.attributes["model"] = model
+
+
+def record_attempt():
+    # Called once per HTTP request an LLM call makes; more than one attempt means retries
+    current = _current.get() if _enabled else None
+    if current is not None and current.kind == "llm":
+        current.attributes["attempts"] = current.attributes.get("attempts", 0) + 1
+
+
+def traced_step(fn):
+    # Wraps a workflow step (under @step) in a span, recording its wall time and how long the
+    # triggering event waited before the step picked it up. The first step opens the workflow
+    # span, which is closed by the step that returns the StopEvent.
+    @functools.wraps(fn)
+    async def wrapper(self, ev, ctx, *args, **kwargs):
+        if not _enabled:
+            return await fn(self, ev, ctx, *args, **kwargs)
+
+        from llama_index.core.workflow import StartEvent, StopEvent
+
+        workflow_name = type(self).__name__
+        if isinstance(ev, StartEvent):
+            root = start_span(workflow_name, "workflow", parent=None, workflow=workflow_name)
+            await ctx.set("_trace_root", root)
+        else:
+            root = await ctx.get("_trace_root", default=None)
+
+        emitted = root._emitted.pop(id(ev), None) if root is not None else None
+        attributes = {"workflow": workflow_name, "event": type(ev).__name__}
+        if emitted is not None and emitted[0] is ev:
+            attributes["queue_time"] = time.perf_counter() - emitted[1]
+        current = start_span(fn.__name__, "step", parent=root, **attributes)
+        token, root_token = _current.set(current), _current_root.set(root)
+        try:
+            result = await fn(self, ev, ctx, *args, **kwargs)
+        except BaseException as e:
+            finish_span(current, e)
+            if root is not None:
+                root._emitted.clear()
+                finish_span(root, e)
+            raise
+        finally:
+            _current.reset(token)
+            _current_root.reset(root_token)
+        finish_span(current)
+
+        if isinstance(result, StopEvent):
+            if root is not None:
+                root._emitted.clear()
+                finish_span(root)
+        elif result is not None and root is not None:
+            root._emitted[id(result)] = (result, time.perf_counter())
+        return result
+
+    return wrapper
+
+
+def send_event(ctx, event):
+    # ctx.send_event for traced steps: the event is stamped like a returned one, so the step it
+    # triggers records how long it queued (e.g. each task of a fan-out)
+    root = _current_root.get() if _enabled else None
+    if root is not None:
+        root._emitted[id(event)] = (event, time.perf_counter())
+    ctx.send_event(event)
+
+
+def _install_llm_handler():
+    # LLM calls made by llama-index agents are traced through its instrumentation events
+    global _handler_installed
+    with _lock:
+        if _handler_installed:
+            return
+        _handler_installed = True
+
+    from llama_index.core.instrumentation import get_dispatcher
+    from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+    from llama_index.core.instrumentation.events.llm import LLMChatEndEvent, LLMChatStartEvent
+
+    class LLMTraceHandler(BaseEventHandler):
+        @classmethod
+        def class_name(cls) -> str:
+            return "LLMTraceHandler"
+
+        def handle(self, event, **kwargs):
+            if not _enabled:
+                return
+            if isinstance(event, LLMChatStartEvent):
+                model = (event.model_dict or {}).get("model")
+                _llm_spans[str(event.span_id)] = start_span("llm.chat", "llm", model=model)
+            elif isinstance(event, LLMChatEndEvent):
+                current = _llm_spans.pop(str(event.span_id), None)
+                if current is None:
+                    return
+                raw = getattr(event.response, "raw", None) if event.response is not None else None
+                usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+                record_usage(current, usage)
+                finish_span(current)
+
+    get_dispatcher().add_event_handler(LLMTraceHandler())
+
+
+def _model_prices(model: str):
+    # Dated snapshots (gpt-4o-2024-08-06) are priced like their base model
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(f"{name}-")]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def _aggregate(span: Span):
+    workflow = span.attributes.get("workflow") or "(none)"
+    with _lock:
+        entry = _aggregates.setdefault(workflow, {
+            "runs": 0, "errors": 0, "wall_time": 0.0, "steps": {},
+            "llm": {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "time": 0.0, "cost": 0.0,
+                    "unpriced_calls": 0},
+            "tools": {},
+        })
+        if span.kind == "workflow":
+            entry["runs"] += 1
+            entry["errors"] += span.error is not None
+            entry["wall_time"] += span.duration
+        elif span.kind == "step":
+            step = entry["steps"].setdefault(span.name, {"count": 0, "time": 0.0, "queue_time": 0.0})
+            step["count"] += 1
+            step["time"] += span.duration
+            step["queue_time"] += span.attributes.get("queue_time", 0.0)
+        elif span.kind == "llm":
+            llm = entry["llm"]
+            prompt_tokens = span.attributes.get("prompt_tokens", 0)
+            completion_tokens = span.attributes.get("completion_tokens", 0)
+            llm["calls"] += 1
+            llm["time"] += span.duration
+            llm["prompt_tokens"] += prompt_tokens
+            llm["completion_tokens"] += completion_tokens
+            llm["retries"] += max(span.attributes.get("attempts", 1) - 1, 0)
+            prices = _model_prices(span.attributes.get("model") or "")
+            if prices:
+                llm["cost"] += (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1e6
+            else:
+                llm["unpriced_calls"] += 1
+        elif span.kind == "tool":
+            tool = entry["tools"].setdefault(span.name, {"calls": 0, "errors": 0, "time": 0.0})
+            tool["calls"] += 1
+            tool["errors"] += span.error is not None
+            tool["time"] += span.duration
+
+
+def summary() -> Dict[str, Dict[str, Any]]:
+    # Totals per workflow since start (or reset()), with per-run averages
+    with _lock:
+        result = json.loads(json.dumps(_aggregates))
+    for entry in result.values():
+        runs = entry["runs"] or 1
+        entry["avg_wall_time"] = entry["wall_time"] / runs
+        entry["avg_cost"] = entry["llm"]["cost"] / runs
+    return result
+
+
+def reset():
+    with _lock:
+        _aggregates.clear()
+        _llm_spans.clear()
+
+
+if _enabled:
+    configure(enabled=True, jsonl_path=_jsonl_path, otel=os.getenv("TRACE_OTEL", "").lower() in ("1", "true", "yes"))
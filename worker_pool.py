@@ -0,0 +1,178 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context, resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import os
+import threading
+import time
+
+# Worker processes for CPU-bound jobs (embeddings, deck rendering); 0 keeps everything in-process,
+# "auto" uses one per core
+WORKER_PROCESSES = os.getenv("WORKER_PROCESSES", "0")
+# Smallest embedding batch worth sending to a worker of its own
+MIN_EMBED_CHUNK = 16
+
+# Per-worker state, loaded once by the initializer and kept for the life of the process
+_encoder = None
+
+
+def encode(encoder, docs: Sequence[str]) -> np.ndarray:
+    # Unit-length float32 rows, so cosine similarity is a dot product
+    embeddings = np.asarray(encoder(list(docs)), dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+def load_encoder():
+    from semantic_router.encoders import FastEmbedEncoder
+    from semantic_workflow_router import ENCODER_NAME
+
+    return FastEmbedEncoder(name=ENCODER_NAME)
+
+
+def _init_worker(encoder_loader: Optional[Callable[[], Any]]):
+    global _encoder
+    # python-pptx is imported once here, not by the first deck
+    import pptx_renderer
+
+    if encoder_loader is not None:
+        _encoder = encoder_loader()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _encoder_info() -> Dict[str, Any]:
+    # What the parent needs to know about the model it does not load itself
+    return {"name": getattr(_encoder, "name", None), "score_threshold": getattr(_encoder, "score_threshold", None)}
+
+
+def _embed_job(docs: List[str]) -> Tuple[str, Tuple[int, ...]]:
+    # The matrix goes back through a shared memory block; only its name and shape are pickled
+    if _encoder is None:
+        raise RuntimeError("This worker pool was started without an encoder")
+    embeddings = encode(_encoder, docs)
+    block = shared_memory.SharedMemory(create=True, size=max(embeddings.nbytes, 1))
+    np.ndarray(embeddings.shape, dtype=np.float32, buffer=block.buf)[:] = embeddings
+    # The parent unlinks the block once it has read it; the worker must not clean it up on exit
+    resource_tracker.unregister(block._name, "shared_memory")
+    block.close()
+    return block.name, embeddings.shape
+
+
+def _render_job(spec: Dict[str, Any], output_path: str) -> str:
+    # The deck is written to output_path (a temporary file of the artifact store) by the worker
+    from pptx_renderer import render_presentation
+
+    render_presentation(spec, None, output_path)
+    return output_path
+
+
+def _read_shared(name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _gather_shared(results: List[Any]) -> np.ndarray:
+    # Every block is read (and so unlinked) even when another chunk failed
+    arrays, error = [], None
+    for result in results:
+        if isinstance(result, BaseException):
+            error = error or result
+        else:
+            arrays.append(_read_shared(*result))
+    if error is not None:
+        raise error
+    return np.concatenate(arrays) if arrays else np.zeros((0, 0), dtype=np.float32)
+
+
+class WorkerPool:
+    # A pool of spawned processes for CPU-bound work that would otherwise hold the GIL in the
+    # process running the workflows. Every worker loads the embedding model and python-pptx once
+    # at startup; embeddings come back through shared memory and decks as files. The parent then
+    # never loads the model itself.
+    def __init__(self, processes: int, encoder_loader: Optional[Callable[[], Any]] = load_encoder):
+        self.processes = processes
+        self.encoder_loader = encoder_loader
+        self.stats = {"embed_jobs": 0, "embedded": 0, "render_jobs": 0, "time": 0.0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "WorkerPool":
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=get_context("spawn"),
+                    initializer=_init_worker, initargs=(self.encoder_loader,),
+                )
+        # One job per worker so every process has started and loaded its models before real work
+        for future in [self._executor.submit(_ping) for _ in range(self.processes)]:
+            future.result()
+        return self
+
+    def stop(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        if self._executor is None:
+            self.start()
+        return self._executor.submit(fn, *args)
+
+    def _record(self, started: float, **counts):
+        with self._lock:
+            self.stats["time"] += time.perf_counter() - started
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def _embed_futures(self, docs: Sequence[str]) -> List[Future]:
+        # Large batches are split across the workers so they are encoded in parallel
+        size = max(MIN_EMBED_CHUNK, -(-len(docs) // self.processes))
+        return [self._submit(_embed_job, list(docs[start:start + size])) for start in range(0, len(docs), size)]
+
+    def embed(self, docs: Sequence[str]) -> np.ndarray:
+        started = time.perf_counter()
+        futures = self._embed_futures(docs)
+        embeddings = _gather_shared([future.exception() or future.result() for future in futures])
+        self._record(started, embed_jobs=len(futures), embedded=len(docs))
+        return embeddings
+
+    def encoder_info(self) -> Dict[str, Any]:
+        return self._submit(_encoder_info).result()
+
+    def render(self, spec: Dict[str, Any], output_path: str) -> str:
+        started = time.perf_counter()
+        path = self._submit(_render_job, spec, output_path).result()
+        self._record(started, render_jobs=1)
+        return path
+
+
+def worker_count(setting: str = WORKER_PROCESSES) -> int:
+    return (os.cpu_count() or 1) if setting == "auto" else int(setting)
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    # None in the default in-process mode
+    global _pool
+    if _pool is None and worker_count() > 0:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(worker_count())
+    return _pool
+
+
+def set_worker_pool(pool: Optional[WorkerPool]):
+    # Lets the dispatcher, tests and benchmarks install (or remove, with None) the pool
+    global _pool
+    _pool = pool